@@ -1,4 +1,5 @@
-from expr import Expr, Binary, Grouping, Literal, Unary
+from expr import Expr, ArrayLiteral, Assign, Binary, Call, Get, Grouping, Index, Literal, Logical, Set, SetIndex, This, Unary, Variable
+from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
 from tokens import Token
 import token_type
 class AstPrinter(Expr):
@@ -7,6 +8,9 @@ class AstPrinter(Expr):
 	
 	def print(self, expr: Expr):
 		return expr.accept(self)			
+
+	def printProgram(self, statements):
+		return "\n".join(statement.accept(self) for statement in statements)
 	
 	def visitBinaryExpr(self, expr: Binary):
 		return self.parenthesize(expr.operator.lexeme, expr.left, expr.right)
@@ -15,10 +19,75 @@ class AstPrinter(Expr):
 		return self.parenthesize("group",expr.expression)
 	
 	def visitLiteralExpr(self, expr: Literal):
+		if expr.value == None: return "nil"
+		if type(expr.value) == str: return f'"{expr.value}"'
+		if type(expr.value) == bool: return "true" if expr.value else "false"
 		return expr.value
 	
 	def visitUnaryExpr(self, expr: Unary):
 		return self.parenthesize(expr.operator.lexeme, expr.right)
+
+	def visitAssignExpr(self, expr: Assign):
+		return self.parenthesize(f"= {expr.name.lexeme}", expr.value)
+
+	def visitCallExpr(self, expr: Call):
+		return self.parenthesize("call", expr.callee, *expr.arguments)
+
+	def visitGetExpr(self, expr: Get):
+		return self.parenthesize(f". {expr.name.lexeme}", expr.object)
+
+	def visitLogicalExpr(self, expr: Logical):
+		return self.parenthesize(expr.operator.lexeme, expr.left, expr.right)
+
+	def visitSetExpr(self, expr: Set):
+		return self.parenthesize(f"= . {expr.name.lexeme}", expr.object, expr.value)
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		return self.parenthesize("array", *expr.elements)
+
+	def visitIndexExpr(self, expr: Index):
+		return self.parenthesize("[]", expr.object, expr.index)
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		return self.parenthesize("= []", expr.object, expr.index, expr.value)
+
+	def visitThisExpr(self, expr: This):
+		return "this"
+
+	def visitVariableExpr(self, expr: Variable):
+		return expr.name.lexeme
+
+	def visitBlockStmt(self, stmt: Block):
+		return self.parenthesize("block", *stmt.statements)
+
+	def visitClassStmt(self, stmt: Class):
+		return self.parenthesize(f"class {stmt.name.lexeme}", *stmt.methods)
+
+	def visitExpressionStmt(self, stmt: Expression):
+		return self.parenthesize(";", stmt.expression)
+
+	def visitFunctionStmt(self, stmt: Function):
+		params = " ".join(param.lexeme for param in stmt.params)
+		return self.parenthesize(f"fun {stmt.name.lexeme}({params})", *stmt.body)
+
+	def visitIfStmt(self, stmt: If):
+		if stmt.elseBranch == None:
+			return self.parenthesize("if", stmt.condition, stmt.thenBranch)
+		return self.parenthesize("if-else", stmt.condition, stmt.thenBranch, stmt.elseBranch)
+
+	def visitPrintStmt(self, stmt: Print):
+		return self.parenthesize("print", stmt.expression)
+
+	def visitReturnStmt(self, stmt: Return):
+		if stmt.value == None: return "(return)"
+		return self.parenthesize("return", stmt.value)
+
+	def visitVarStmt(self, stmt: Var):
+		if stmt.initializer == None: return f"(var {stmt.name.lexeme})"
+		return self.parenthesize(f"var {stmt.name.lexeme}", stmt.initializer)
+
+	def visitWhileStmt(self, stmt: While):
+		return self.parenthesize("while", stmt.condition, stmt.body)
 	
 	def parenthesize(self, name:str , *exprs: Expr):
 		out = ""
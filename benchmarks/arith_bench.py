@@ -0,0 +1,28 @@
+# Arithmetic-heavy loop on the tree-walking interpreter: every iteration
+# evaluates a dozen binary operators and no calls.
+#
+#   python benchmarks/arith_bench.py [iterations]
+import sys
+
+from common import runProgram
+
+program = """
+var x = 0;
+var y = 1;
+var hits = 0;
+for (var i = 0; i < %d; i = i + 1) {
+	x = (x * 3 + i) / 2 - y;
+	y = y + x * 0.5 - i / 4;
+	if (x > y and x >= 0 or y <= -1 and x != y) hits = hits + 1;
+}
+print hits;
+"""
+
+def main(args):
+	iterations = int(args[0]) if args else 100000
+	source = program % iterations
+	best = min(runProgram("tree", source)[0] for attempt in range(3))
+	print(f"tree     {best:.3f} s  {iterations / best:,.0f} iterations/s")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
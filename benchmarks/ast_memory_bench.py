@@ -0,0 +1,82 @@
+# Memory held by the AST of a large generated program: traced bytes that
+# stay alive after parsing, divided by the number of nodes and tokens.
+#
+#   python benchmarks/ast_memory_bench.py [megabytes]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner_bench import generate
+from expr import Binary, Expr
+from parser import Parser
+from regexscanner import RegexScanner
+from stmt import Stmt
+from tokens import Token
+
+def fields(node):
+	# Works for slotted nodes and for the older __dict__ layout alike, so
+	# the numbers can be compared across revisions.
+	if hasattr(node, "__dict__"): return list(vars(node))
+	return type(node).__slots__
+
+def size(obj):
+	if hasattr(obj, "__dict__"): return sys.getsizeof(obj) + sys.getsizeof(obj.__dict__)
+	return sys.getsizeof(obj)
+
+def count(node, seen):
+	# Returns (nodes, tokens) reachable from node, counting shared tokens once.
+	if isinstance(node, list):
+		nodes = tokens = 0
+		for item in node:
+			n, t = count(item, seen)
+			nodes += n
+			tokens += t
+		return nodes, tokens
+	if isinstance(node, Token):
+		if id(node) in seen: return 0, 0
+		seen.add(id(node))
+		return 0, 1
+	if not isinstance(node, (Expr, Stmt)):
+		return 0, 0
+	nodes, tokens = 1, 0
+	for field in fields(node):
+		n, t = count(getattr(node, field), seen)
+		nodes += n
+		tokens += t
+	return nodes, tokens
+
+def main(args):
+	megabytes = float(args[0]) if args else 2
+	source = generate(megabytes)
+	errors = []
+
+	gc.collect()
+	tracemalloc.start()
+	tokens = RegexScanner(source, lambda line, message: errors.append(message)).scanTokens()
+	statements = Parser(tokens, lambda token, message: errors.append(message)).parse()
+	del tokens
+	gc.collect()
+	retained = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+
+	sys.setrecursionlimit(10000)
+	nodes, tokens = count(statements, set())
+	print(f"source: {len(source) / (1024 * 1024):.1f} MB")
+	print(f"nodes: {nodes}, tokens held by the AST: {tokens}")
+	print(f"retained: {retained / (1024 * 1024):.1f} MB, {retained / (nodes + tokens):.1f} bytes per node or token")
+	binary = Binary(None, None, None)
+	print(f"size of a Binary: {size(binary)} bytes, of a Token: {size(Token(0, '', None, 0))} bytes")
+
+	start = time.perf_counter()
+	for i in range(1000000):
+		binary.left
+		binary.operator
+		binary.right
+	print(f"3M attribute reads: {time.perf_counter() - start:.3f} s")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
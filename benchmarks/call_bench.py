@@ -0,0 +1,32 @@
+# Small-function call rate: a loop calling a two-argument function that
+# returns straight away, plus an early return from inside a loop, timed on
+# the tree-walking and closure engines.
+#
+#   python benchmarks/call_bench.py [calls]
+import sys
+
+from common import runProgram
+
+program = """
+fun add(a, b) { return a + b; }
+fun find(n) {
+	for (var i = 0; ; i = i + 1) {
+		if (i == n) return i;
+	}
+}
+var total = 0;
+for (var i = 0; i < %d; i = i + 1) {
+	total = add(total, find(1));
+}
+print total;
+"""
+
+def main(args):
+	calls = int(args[0]) if args else 100000
+	source = program % calls
+	for engine in ("tree", "closure"):
+		seconds, output = runProgram(engine, source)
+		print(f"{engine:8} {seconds:.3f} s  {2 * calls / seconds:,.0f} calls/s")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,27 @@
+# Shared by the benchmark scripts: puts the interpreter on sys.path and
+# runs a Lox program the same way for all of them.
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plox import Plox
+
+def runProgram(engine, source, interpreter=None):
+	# Seconds taken and the output, with print output captured. A program
+	# that fails to compile or run stops the benchmark instead of being
+	# timed. interpreter replaces the engine's own, as --profile does.
+	lox = Plox(engine)
+	lox.cache = False
+	if interpreter != None: lox.interpreter = interpreter
+	output = io.StringIO()
+	start = time.perf_counter()
+	with contextlib.redirect_stdout(output):
+		lox.run(source)
+	elapsed = time.perf_counter() - start
+	if lox.hadError or lox.hadRuntimeError:
+		raise SystemExit(f"{engine} failed:\n{output.getvalue()}")
+	return elapsed, output.getvalue()
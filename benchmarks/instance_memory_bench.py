@@ -0,0 +1,49 @@
+# Builds a linked list of Lox instances with three fields each and reports
+# the memory kept alive per instance, and the time to build and walk it.
+#
+#   python benchmarks/instance_memory_bench.py [instances]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plox import Plox
+
+program = """
+class Node {}
+var head = nil;
+for (var i = 0; i < %d; i = i + 1) {
+	var node = Node();
+	node.value = i;
+	node.label = "node";
+	node.next = head;
+	head = node;
+}
+var total = 0;
+var node = head;
+while (node != nil) {
+	total = total + node.value;
+	node = node.next;
+}
+print total;
+"""
+
+def main(args):
+	instances = int(args[0]) if args else 200000
+	lox = Plox()
+	lox.cache = False
+	gc.collect()
+	tracemalloc.start()
+	start = time.perf_counter()
+	lox.run(program % instances)
+	elapsed = time.perf_counter() - start
+	gc.collect()
+	retained = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	print(f"{instances} instances: {retained / instances:.1f} bytes each, {elapsed:.2f} s (under tracemalloc)")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
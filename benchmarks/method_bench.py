@@ -0,0 +1,58 @@
+# Method-call heavy Lox program: times it on the tree-walking and closure
+# engines, then counts the environments and function objects a run creates.
+#
+#   python benchmarks/method_bench.py [iterations]
+import sys
+
+from common import runProgram
+from enviroment import LocalEnviroment
+from loxfunction import LoxFunction
+from plox import Plox
+
+program = """
+class Vector {
+	add(other) {
+		var v = Vector();
+		v.x = this.x + other.x;
+		v.y = this.y + other.y;
+		return v;
+	}
+	dot(other) { return this.x * other.x + this.y * other.y; }
+	scaled(k) { this.x = this.x * k; this.y = this.y * k; return this; }
+}
+var a = Vector();
+a.x = 1; a.y = 2;
+var b = Vector();
+b.x = 3; b.y = 4;
+var total = 0;
+for (var i = 0; i < %d; i = i + 1) {
+	total = total + a.add(b).scaled(0.5).dot(b);
+}
+print total;
+"""
+
+def count(source):
+	created = {LocalEnviroment: 0, LoxFunction: 0}
+	def profile(frame, event, arg):
+		if event == "call" and frame.f_code.co_name == "__init__":
+			cls = type(frame.f_locals.get("self"))
+			for base in created:
+				if issubclass(cls, base): created[base] += 1
+	sys.setprofile(profile)
+	try:
+		Plox().run(source)
+	finally:
+		sys.setprofile(None)
+	return created
+
+def main(args):
+	iterations = int(args[0]) if args else 20000
+	source = program % iterations
+	for engine in ("tree", "closure"):
+		seconds, output = runProgram(engine, source)
+		print(f"{engine:8} {seconds:.3f} s")
+	created = count(source)
+	print(f"per iteration (tree): {created[LocalEnviroment] / iterations:.1f} environments, {created[LoxFunction] / iterations:.1f} functions")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,34 @@
+# A square root written in Lox (Newton's method) against the sqrt native,
+# on the tree-walking and closure engines.
+#
+#   python benchmarks/natives_bench.py [iterations]
+import sys
+
+from common import runProgram
+
+lox_sqrt = """
+fun root(x) {
+	var guess = x / 2;
+	for (var i = 0; i < 20; i = i + 1) guess = (guess + x / guess) / 2;
+	return guess;
+}
+var total = 0;
+for (var i = 1; i <= %d; i = i + 1) total = total + root(i);
+print total;
+"""
+
+native_sqrt = """
+var total = 0;
+for (var i = 1; i <= %d; i = i + 1) total = total + sqrt(i);
+print total;
+"""
+
+def main(args):
+	iterations = int(args[0]) if args else 10000
+	for engine in ("tree", "closure"):
+		lox, output = runProgram(engine, lox_sqrt % iterations)
+		native, output = runProgram(engine, native_sqrt % iterations)
+		print(f"{engine:8} lox {lox:.3f} s  native {native:.3f} s  x{lox / native:.1f}")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
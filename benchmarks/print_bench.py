@@ -0,0 +1,34 @@
+# Times a print-heavy Lox program writing into a pipe, with print output
+# buffered (the default) and with --unbuffered.
+#
+#   python benchmarks/print_bench.py [lines]
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+program = """
+for (var i = 0; i < %d; i = i + 1) print i;
+"""
+
+def run(path, options):
+	start = time.perf_counter()
+	subprocess.run([sys.executable, os.path.join(root, "plox.py"), "--no-cache"] + options + [path], stdout=subprocess.PIPE, check=True)
+	return time.perf_counter() - start
+
+def main(args):
+	lines = int(args[0]) if args else 200000
+	with tempfile.TemporaryDirectory() as directory:
+		path = os.path.join(directory, "print.lox")
+		with open(path, "w") as source:
+			source.write(program % lines)
+		for engine in ("tree", "vm"):
+			buffered = run(path, [f"--engine={engine}"])
+			unbuffered = run(path, [f"--engine={engine}", "--unbuffered"])
+			print(f"{engine:8} buffered {buffered:.3f} s  unbuffered {unbuffered:.3f} s  x{unbuffered / buffered:.1f}")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
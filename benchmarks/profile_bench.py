@@ -0,0 +1,49 @@
+# Cost of --profile and --sample: times a call-heavy program on the plain
+# tree-walking interpreter, with function profiling, with line profiling as
+# well, and with the sampling profiler running.
+#
+#   python benchmarks/profile_bench.py [n]
+import sys
+
+from common import runProgram
+from interpreter import Interpreter
+from profiler import ProfilingInterpreter, Sampler, SamplingInterpreter
+
+program = """
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+class Counter {
+	add(n) { this.count = this.count + n; return this; }
+}
+var counter = Counter();
+counter.count = 0;
+for (var i = 0; i < %d; i = i + 1) counter.add(fib(5));
+print counter.count;
+"""
+
+def run(interpreter, source):
+	seconds, output = runProgram("tree", source, interpreter)
+	return seconds
+
+def runSampled(source):
+	interpreter = SamplingInterpreter()
+	sampler = Sampler(interpreter)
+	sampler.start()
+	try:
+		return run(interpreter, source)
+	finally:
+		sampler.stop()
+
+def main(args):
+	n = int(args[0]) if args else 5000
+	source = program % n
+	plain = min(run(Interpreter(), source) for attempt in range(3))
+	functions = min(run(ProfilingInterpreter(), source) for attempt in range(3))
+	lines = min(run(ProfilingInterpreter(True), source) for attempt in range(3))
+	sampled = min(runSampled(source) for attempt in range(3))
+	print(f"off        {plain:.3f} s")
+	print(f"functions  {functions:.3f} s  x{functions / plain:.2f}")
+	print(f"lines      {lines:.3f} s  x{lines / plain:.2f}")
+	print(f"sampling   {sampled:.3f} s  x{sampled / plain:.2f}")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
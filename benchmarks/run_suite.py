@@ -0,0 +1,117 @@
+# Runs the Lox programs in benchmarks/lox under every engine, plus a
+# front-end-only benchmark on a large generated script under every scanner
+# mode, and reports the median and standard deviation of each. Results can
+# be written as JSON and compared against an earlier run: any median more
+# than --threshold percent slower than the baseline fails the run.
+#
+#   python benchmarks/run_suite.py [name...] [--engines=tree,vm,...]
+#       [--warmup=1] [--repeat=5] [--json=out.json]
+#       [--baseline=old.json] [--threshold=10]
+import json
+import os
+import statistics
+import sys
+import time
+
+from common import runProgram
+from plox import ENGINES, Plox
+from scanner_bench import chunk
+
+PROGRAMS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lox")
+PARSE_MODES = ("list", "stream", "columnar")
+
+def parseSource(megabytes=0.5):
+	parts = []
+	size = 0
+	while size < megabytes * 1024 * 1024:
+		part = chunk % ((len(parts),) * chunk.count("%d"))
+		parts.append(part)
+		size += len(part)
+	return "".join(parts)
+
+def runParse(mode, source):
+	lox = Plox()
+	lox.stream = mode == "stream"
+	lox.columnar = mode == "columnar"
+	start = time.perf_counter()
+	statements = lox.compile(source)
+	elapsed = time.perf_counter() - start
+	if statements == None: raise SystemExit(f"{mode} failed to parse")
+	return elapsed, len(statements)
+
+def measure(run, config, source, warmup, repeat):
+	for attempt in range(warmup):
+		run(config, source)
+	times = []
+	results = set()
+	for attempt in range(repeat):
+		elapsed, result = run(config, source)
+		times.append(elapsed)
+		results.add(result)
+	return times, results
+
+def summarize(times):
+	return {
+		"median": statistics.median(times),
+		"stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+		"runs": times,
+	}
+
+def benchmarks(names, engines):
+	# (name, run, configs, source) for everything selected.
+	selected = []
+	for file_name in sorted(os.listdir(PROGRAMS)):
+		name = file_name[:-len(".lox")]
+		if not file_name.endswith(".lox") or (names and name not in names): continue
+		with open(os.path.join(PROGRAMS, file_name), 'r') as source_file:
+			selected.append((name, runProgram, engines, source_file.read()))
+	if not names or "parse" in names:
+		selected.append(("parse", runParse, PARSE_MODES, parseSource()))
+	return selected
+
+def compare(results, baseline, threshold):
+	regressions = []
+	for key, result in results.items():
+		if key not in baseline: continue
+		ratio = result["median"] / baseline[key]["median"]
+		marker = ""
+		if ratio > 1 + threshold / 100:
+			marker = "  REGRESSION"
+			regressions.append(key)
+		print(f"{key:28} {baseline[key]['median']:8.4f} -> {result['median']:8.4f} s  x{ratio:.2f}{marker}")
+	return regressions
+
+def main(args):
+	options = dict(arg[2:].split("=", 1) for arg in args if arg.startswith("--") and "=" in arg)
+	names = [arg for arg in args if not arg.startswith("--")]
+	engines = options["engines"].split(",") if "engines" in options else ENGINES
+	warmup = int(options.get("warmup", 1))
+	repeat = int(options.get("repeat", 5))
+	threshold = float(options.get("threshold", 10))
+
+	results = {}
+	for name, run, configs, source in benchmarks(names, engines):
+		outputs = set()
+		for config in configs:
+			times, results_seen = measure(run, config, source, warmup, repeat)
+			outputs |= results_seen
+			key = f"{name}/{config}"
+			results[key] = summarize(times)
+			print(f"{key:28} median {results[key]['median']:8.4f} s  stdev {results[key]['stdev']:7.4f}")
+		if len(outputs) != 1:
+			raise SystemExit(f"{name}: configurations disagree on the result")
+
+	if "json" in options:
+		with open(options["json"], "w") as json_file:
+			json.dump({"warmup": warmup, "repeat": repeat, "results": results}, json_file, indent=2)
+	if "baseline" in options:
+		with open(options["baseline"], 'r') as baseline_file:
+			baseline = json.load(baseline_file)["results"]
+		print()
+		regressions = compare(results, baseline, threshold)
+		if regressions:
+			print(f"{len(regressions)} regressed by more than {threshold:g}%")
+			sys.exit(1)
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,71 @@
+# Compares Scanner and RegexScanner on a generated multi-megabyte Lox
+# source, after checking that both produce the same tokens and errors.
+#
+#   python benchmarks/scanner_bench.py [megabytes]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from regexscanner import RegexScanner
+from scanner import Scanner
+
+chunk = """// generated benchmark source
+class Point {
+	init(x, y) { this.x = x; this.y = y; }
+	length() { return this.x * this.x + this.y * this.y; }
+}
+
+fun fib_%d(n) {
+	if (n <= 1) return n;
+	return fib_%d(n - 2) + fib_%d(n - 1);
+}
+
+var message_%d = "line one
+line two";
+var total_%d = 0;
+for (var i = 0; i < 100.25; i = i + 1) {
+	total_%d = total_%d + fib_%d(i) / 2 - -1;
+	if (!(total_%d >= 10) and total_%d != nil or false) print message_%d;
+}
+"""
+
+def generate(megabytes):
+	parts = []
+	size = 0
+	n = 0
+	while size < megabytes * 1024 * 1024:
+		part = chunk % ((n,) * chunk.count("%d"))
+		parts.append(part)
+		size += len(part)
+		n += 1
+	# A few stray characters so the error paths are exercised too.
+	parts.append("var odd = 1 # 2 @;\nprint \"never closed\n")
+	return "".join(parts)
+
+def scan(scanner_class, source):
+	errors = []
+	start = time.perf_counter()
+	tokens = scanner_class(source, lambda line, message: errors.append((line, message))).scanTokens()
+	return time.perf_counter() - start, tokens, errors
+
+def main(args):
+	megabytes = float(args[0]) if args else 4
+	source = generate(megabytes)
+	print(f"source: {len(source) / (1024 * 1024):.1f} MB")
+
+	classicTime, classicTokens, classicErrors = scan(Scanner, source)
+	regexTime, regexTokens, regexErrors = scan(RegexScanner, source)
+
+	fields = lambda token: (token.token_type, token.lexeme, token.literal, token.line)
+	if list(map(fields, classicTokens)) != list(map(fields, regexTokens)) or classicErrors != regexErrors:
+		print("token streams differ")
+		exit(1)
+
+	print(f"tokens: {len(regexTokens)}, errors: {len(regexErrors)}")
+	print(f"Scanner:      {classicTime:.3f} s")
+	print(f"RegexScanner: {regexTime:.3f} s ({classicTime / regexTime:.1f}x)")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,53 @@
+# Peak RSS of scanning and parsing a large generated script, with the token
+# list materialized up front, with tokens streamed into the parser and with
+# the columnar token store. Each mode runs in a fresh process so the numbers
+# do not contaminate each other.
+#
+#   python benchmarks/stream_bench.py [megabytes]
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner_bench import generate
+
+def child(mode, path):
+	from parser import ColumnarParser, Parser, StreamingParser
+	from regexscanner import RegexScanner
+
+	with open(path, 'r') as source_file:
+		source = source_file.read()
+	errors = []
+	start = time.perf_counter()
+	scanner = RegexScanner(source, lambda line, message: errors.append(message))
+	if mode == "stream":
+		parser = StreamingParser(scanner.scanTokensLazily(), lambda token, message: errors.append(message))
+	elif mode == "columnar":
+		parser = ColumnarParser(scanner.scanTokenStore(), lambda token, message: errors.append(message))
+	else:
+		parser = Parser(scanner.scanTokens(), lambda token, message: errors.append(message))
+	statements = parser.parse()
+	elapsed = time.perf_counter() - start
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	print(f"{mode:8} {len(statements):8} statements  {elapsed:6.2f} s  peak RSS {peak / 1024:7.1f} MB")
+
+def main(args):
+	megabytes = float(args[0]) if args else 8
+	with tempfile.NamedTemporaryFile("w", suffix=".lox", delete=False) as source_file:
+		source_file.write(generate(megabytes))
+	try:
+		print(f"source: {os.path.getsize(source_file.name) / (1024 * 1024):.1f} MB")
+		for mode in ("list", "stream", "columnar"):
+			subprocess.run([sys.executable, __file__, "--child", mode, source_file.name], check=True)
+	finally:
+		os.remove(source_file.name)
+
+if __name__ == '__main__':
+	if sys.argv[1:2] == ["--child"]:
+		child(sys.argv[2], sys.argv[3])
+	else:
+		main(sys.argv[1:])
@@ -0,0 +1,52 @@
+# Scores the same records with a scalar Lox loop over arrays and with the
+# NumPy-backed vector natives, on the tree-walking and closure engines.
+#
+#   python benchmarks/vec_bench.py [length] [rounds]
+import importlib.util
+import sys
+
+from common import runProgram
+
+setup = """
+var features = [];
+var weights = [];
+for (var i = 0; i < %d; i = i + 1) {
+	push(features, i / 7);
+	push(weights, 1 / (i + 1));
+}
+var total = 0;
+"""
+
+scalar = setup + """
+for (var round = 0; round < %d; round = round + 1) {
+	var score = 0;
+	for (var i = 0; i < len(features); i = i + 1) {
+		score = score + (features[i] * 2 + 1) * weights[i];
+	}
+	total = total + score;
+}
+print total;
+"""
+
+vectorized = setup + """
+var f = vec(features);
+var w = vec(weights);
+for (var round = 0; round < %d; round = round + 1) {
+	total = total + dot(f * 2 + 1, w);
+}
+print total;
+"""
+
+def main(args):
+	if importlib.util.find_spec("numpy") == None:
+		print("NumPy is not installed; there are no vectors to compare.")
+		return
+	length = int(args[0]) if args else 5000
+	rounds = int(args[1]) if len(args) > 1 else 20
+	for engine in ("tree", "closure"):
+		loop, output = runProgram(engine, scalar % (length, rounds))
+		vector, output = runProgram(engine, vectorized % (length, rounds))
+		print(f"{engine:8} loop {loop:.3f} s  vec {vector:.3f} s  x{loop / vector:.1f}")
+
+if __name__ == '__main__':
+	main(sys.argv[1:])
@@ -0,0 +1,96 @@
+OP_CONSTANT = 0
+OP_NIL = 1
+OP_TRUE = 2
+OP_FALSE = 3
+OP_POP = 4
+OP_GET_LOCAL = 5
+OP_SET_LOCAL = 6
+OP_GET_GLOBAL = 7
+OP_DEFINE_GLOBAL = 8
+OP_SET_GLOBAL = 9
+OP_GET_UPVALUE = 10
+OP_SET_UPVALUE = 11
+OP_GET_PROPERTY = 12
+OP_SET_PROPERTY = 13
+OP_EQUAL = 14
+OP_NOT_EQUAL = 15
+OP_GREATER = 16
+OP_GREATER_EQUAL = 17
+OP_LESS = 18
+OP_LESS_EQUAL = 19
+OP_ADD = 20
+OP_SUBTRACT = 21
+OP_MULTIPLY = 22
+OP_DIVIDE = 23
+OP_NOT = 24
+OP_NEGATE = 25
+OP_PRINT = 26
+OP_JUMP = 27
+OP_JUMP_IF_FALSE = 28
+OP_LOOP = 29
+OP_CALL = 30
+OP_INVOKE = 31
+OP_CLOSURE = 32
+OP_CLOSE_UPVALUE = 33
+OP_RETURN = 34
+OP_CLASS = 35
+OP_METHOD = 36
+OP_JUMP_IF_TRUE = 37
+OP_POP_JUMP_IF_FALSE = 38
+OP_TAIL_CALL = 39
+OP_TAIL_INVOKE = 40
+OP_ARRAY = 41
+OP_GET_INDEX = 42
+OP_SET_INDEX = 43
+# Superinstructions for the commonest pairs. Assignment statements store
+# without leaving the value for an OP_POP; + and - take a constant right
+# operand inline; conditions compare and jump when the test fails.
+OP_STORE_LOCAL = 44
+OP_STORE_GLOBAL = 45
+OP_STORE_UPVALUE = 46
+OP_STORE_PROPERTY = 47
+OP_ADD_CONSTANT = 48
+OP_SUBTRACT_CONSTANT = 49
+OP_TEST_EQUAL = 50
+OP_TEST_NOT_EQUAL = 51
+OP_TEST_GREATER = 52
+OP_TEST_GREATER_EQUAL = 53
+OP_TEST_LESS = 54
+OP_TEST_LESS_EQUAL = 55
+
+
+class PropertyCache:
+	# Inline cache of one property instruction, keyed by shape like the tree
+	# interpreter's Get and Set nodes: a field index or a method on reads,
+	# a field index or the shape adding the field moves to on writes.
+	__slots__ = ("shape", "index", "method", "transition")
+
+	def __init__(self):
+		self.shape = None
+		self.index = None
+		self.method = None
+		self.transition = None
+
+class Chunk:
+	# Code is a flat list of ints: each opcode is followed inline by its
+	# operands. lines runs parallel to code so every entry maps to a source line.
+	def __init__(self):
+		self.code = []
+		self.lines = []
+		self.constants = []
+		self.constantIndex = {}
+
+	def write(self, byte, line):
+		self.code.append(byte)
+		self.lines.append(line)
+
+	def addConstant(self, value):
+		# Numbers and strings share pool entries; repr keeps 0.0 and -0.0 apart.
+		if type(value) == float or type(value) == str:
+			key = (type(value), repr(value))
+			if key not in self.constantIndex:
+				self.constants.append(value)
+				self.constantIndex[key] = len(self.constants) - 1
+			return self.constantIndex[key]
+		self.constants.append(value)
+		return len(self.constants) - 1
@@ -0,0 +1,462 @@
+from completion import RETURN
+from enviroment import LocalEnviroment
+from expr import ArrayLiteral, Assign, Binary, Call, Get, Grouping, Index, Literal, Logical, Set, SetIndex, This, Unary, Variable
+from globals import NativeError
+from loxarray import LoxArray
+from loxcallable import LoxCallable
+from loxclass import LoxClass
+from loxfunction import LoxFunction
+from loxinstance import LoxInstance
+from loxmap import LoxMap
+from loxvec import LoxVec, elementwise
+from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
+from token_type import *
+
+class ClosureFunction(LoxFunction):
+	def __init__(self, declaration, closure, body, receiver=None):
+		super().__init__(declaration, closure, receiver)
+		self.body = body
+
+	def call(self, interpreter, arguments):
+		if self.receiver != None: arguments.insert(0, self.receiver)
+		locals = self.declaration.size - len(arguments)
+		if locals: arguments += [None] * locals
+		if self.body(LocalEnviroment(self.closure, arguments)) is RETURN:
+			return interpreter.returnValue
+		return None
+
+	def bind(self, instance):
+		return ClosureFunction(self.declaration, self.closure, self.body, instance)
+
+class ClosureCompiler:
+	# Turns each node into a Python closure once; running the program is then
+	# plain nested calls taking the current environment, with no visitor
+	# dispatch or operator tests left at run time. Statement closures report
+	# a return the way Interpreter.execute does: by handing back RETURN.
+	def __init__(self, interpreter):
+		self.interpreter = interpreter
+		self.globals = interpreter.globals
+
+	def interpret(self, statements, lox):
+		program = self.sequence(statements)
+		try:
+			program(self.globals)
+		except RuntimeError as error:
+			lox.runtimeError(error)
+
+	def compileExpr(self, expr):
+		return expr.accept(self)
+
+	def compileStmt(self, stmt):
+		return stmt.accept(self)
+
+	def sequence(self, statements):
+		compiled = [self.compileStmt(statement) for statement in statements]
+		if len(compiled) == 1:
+			return compiled[0]
+		def sequence(env):
+			for statement in compiled:
+				if statement(env) is RETURN: return RETURN
+		return sequence
+
+	def visitBlockStmt(self, stmt: Block):
+		body = self.sequence(stmt.statements)
+		size = stmt.size
+		def block(env):
+			return body(LocalEnviroment(env, [None] * size))
+		return block
+
+	def visitClassStmt(self, stmt: Class):
+		name = stmt.name.lexeme
+		methods = [(method, self.sequence(method.body)) for method in stmt.methods]
+		define = self.define(stmt.slot, name)
+		def klass(env):
+			functions = {}
+			for method, body in methods:
+				functions[method.name.lexeme] = ClosureFunction(method, env, body)
+			define(env, LoxClass(name, functions))
+		return klass
+
+	def visitExpressionStmt(self, stmt: Expression):
+		return self.compileExpr(stmt.expression)
+
+	def visitFunctionStmt(self, stmt: Function):
+		body = self.sequence(stmt.body)
+		define = self.define(stmt.slot, stmt.name.lexeme)
+		def function(env):
+			define(env, ClosureFunction(stmt, env, body))
+		return function
+
+	def visitIfStmt(self, stmt: If):
+		condition = self.compileExpr(stmt.condition)
+		thenBranch = self.compileStmt(stmt.thenBranch)
+		if stmt.elseBranch == None:
+			def ifThen(env):
+				value = condition(env)
+				if value is not None and value is not False:
+					return thenBranch(env)
+			return ifThen
+		elseBranch = self.compileStmt(stmt.elseBranch)
+		def ifElse(env):
+			value = condition(env)
+			if value is not None and value is not False:
+				return thenBranch(env)
+			return elseBranch(env)
+		return ifElse
+
+	def visitPrintStmt(self, stmt: Print):
+		expression = self.compileExpr(stmt.expression)
+		stringify = self.interpreter.stringify
+		writeLine = self.interpreter.output.writeLine
+		def printStmt(env):
+			writeLine(stringify(expression(env)))
+		return printStmt
+
+	def visitReturnStmt(self, stmt: Return):
+		interpreter = self.interpreter
+		if stmt.value == None:
+			def returnNil(env):
+				interpreter.returnValue = None
+				return RETURN
+			return returnNil
+		value = self.compileExpr(stmt.value)
+		def returnValue(env):
+			interpreter.returnValue = value(env)
+			return RETURN
+		return returnValue
+
+	def visitVarStmt(self, stmt: Var):
+		define = self.define(stmt.slot, stmt.name.lexeme)
+		if stmt.initializer == None:
+			def declare(env):
+				define(env, None)
+			return declare
+		initializer = self.compileExpr(stmt.initializer)
+		def var(env):
+			define(env, initializer(env))
+		return var
+
+	def visitWhileStmt(self, stmt: While):
+		condition = self.compileExpr(stmt.condition)
+		body = self.compileStmt(stmt.body)
+		def loop(env):
+			value = condition(env)
+			while value is not None and value is not False:
+				if body(env) is RETURN: return RETURN
+				value = condition(env)
+		return loop
+
+	def define(self, slot, name):
+		if slot == None:
+			values = self.globals.values
+			def defineGlobal(env, value):
+				values[name] = value
+			return defineGlobal
+		def defineLocal(env, value):
+			env.values[slot] = value
+		return defineLocal
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		elements = [self.compileExpr(element) for element in expr.elements]
+		return lambda env: LoxArray([element(env) for element in elements])
+
+	def visitAssignExpr(self, expr: Assign):
+		value = self.compileExpr(expr.value)
+		name = expr.name
+		slot = expr.slot
+		depth = expr.depth
+		if depth == None:
+			values = self.globals.values
+			def assignGlobal(env):
+				result = value(env)
+				if name.lexeme not in values:
+					raise RuntimeError(name, f"Undefined variable {name.lexeme}.")
+				values[name.lexeme] = result
+				return result
+			return assignGlobal
+		if depth == 0:
+			def assignLocal(env):
+				result = env.values[slot] = value(env)
+				return result
+			return assignLocal
+		def assignEnclosing(env):
+			result = env.ancestor(depth).values[slot] = value(env)
+			return result
+		return assignEnclosing
+
+	def visitBinaryExpr(self, expr: Binary):
+		left = self.compileExpr(expr.left)
+		right = self.compileExpr(expr.right)
+		operator = expr.operator
+
+		if operator.token_type == PLUS:
+			def add(env):
+				a = left(env)
+				b = right(env)
+				if (type(a) == float and type(b) == float) or (type(a) == str and type(b) == str):
+					return a + b
+				if type(a) == LoxVec or type(b) == LoxVec: return elementwise(operator, a, b)
+				raise RuntimeError(operator, "Operator must be two numbers or two strings.")
+			return add
+
+		if operator.token_type == MINUS:
+			def subtract(env):
+				a = left(env)
+				b = right(env)
+				if type(a) == float and type(b) == float: return a - b
+				if type(a) == LoxVec or type(b) == LoxVec: return elementwise(operator, a, b)
+				raise RuntimeError(operator, "Operands must be numbers.")
+			return subtract
+
+		if operator.token_type == STAR:
+			def multiply(env):
+				a = left(env)
+				b = right(env)
+				if type(a) == float and type(b) == float: return a * b
+				if type(a) == LoxVec or type(b) == LoxVec: return elementwise(operator, a, b)
+				raise RuntimeError(operator, "Operands must be numbers.")
+			return multiply
+
+		if operator.token_type == SLASH:
+			def divide(env):
+				a = left(env)
+				b = right(env)
+				if type(a) == float and type(b) == float: return a / b
+				if type(a) == LoxVec or type(b) == LoxVec: return elementwise(operator, a, b)
+				raise RuntimeError(operator, "Operands must be numbers.")
+			return divide
+
+		if operator.token_type == LESS:
+			def less(env):
+				a = left(env)
+				b = right(env)
+				if type(a) == float and type(b) == float: return a < b
+				raise RuntimeError(operator, "Operands must be numbers.")
+			return less
+
+		if operator.token_type == LESS_EQUAL:
+			def lessEqual(env):
+				a = left(env)
+				b = right(env)
+				if type(a) == float and type(b) == float: return a <= b
+				raise RuntimeError(operator, "Operands must be numbers.")
+			return lessEqual
+
+		if operator.token_type == GREATER:
+			def greater(env):
+				a = left(env)
+				b = right(env)
+				if type(a) == float and type(b) == float: return a > b
+				raise RuntimeError(operator, "Operands must be numbers.")
+			return greater
+
+		if operator.token_type == GREATER_EQUAL:
+			def greaterEqual(env):
+				a = left(env)
+				b = right(env)
+				if type(a) == float and type(b) == float: return a >= b
+				raise RuntimeError(operator, "Operands must be numbers.")
+			return greaterEqual
+
+		if operator.token_type == EQUAL_EQUAL:
+			return lambda env: left(env) == right(env)
+
+		return lambda env: left(env) != right(env)
+
+	def visitCallExpr(self, expr: Call):
+		if type(expr.callee) == Get:
+			return self.invoke(expr)
+		callee = self.compileExpr(expr.callee)
+		arguments = [self.compileExpr(argument) for argument in expr.arguments]
+		paren = expr.paren
+		interpreter = self.interpreter
+		def call(env):
+			function = callee(env)
+			values = [argument(env) for argument in arguments]
+			if not isinstance(function, LoxCallable):
+				raise RuntimeError(paren, "Can only call functions and classes.")
+			if len(values) != function.arity():
+				raise RuntimeError(paren, f"Expected {function.arity()} arguments but got {len(values)}.")
+			try:
+				return function.call(interpreter, values)
+			except NativeError as error:
+				raise RuntimeError(paren, error.message)
+		return call
+
+	def invoke(self, expr: Call):
+		# obj.method(args) calls the method with obj as 'this' instead of
+		# binding it first. Like the interpreter's Get nodes, the site caches
+		# the last shape it saw and what the name resolved to on it.
+		obj = self.compileExpr(expr.callee.object)
+		arguments = [self.compileExpr(argument) for argument in expr.arguments]
+		name = expr.callee.name
+		lexeme = name.lexeme
+		paren = expr.paren
+		interpreter = self.interpreter
+		cachedShape = None
+		cachedIndex = None
+		cachedMethod = None
+		def invoke(env):
+			nonlocal cachedShape, cachedIndex, cachedMethod
+			instance = obj(env)
+			if not isinstance(instance, LoxInstance):
+				raise RuntimeError(name, "Only instances have properties.")
+			if instance.shape is not cachedShape:
+				cachedIndex = instance.shape.indexes.get(lexeme)
+				cachedMethod = None
+				if cachedIndex == None:
+					cachedMethod = instance.klass.findMethod(lexeme)
+					if cachedMethod == None:
+						raise RuntimeError(name, f"Undefined property '{lexeme}'.")
+				cachedShape = instance.shape
+			if cachedMethod != None:
+				method = cachedMethod
+				values = [argument(env) for argument in arguments]
+				if len(values) != method.arity():
+					raise RuntimeError(paren, f"Expected {method.arity()} arguments but got {len(values)}.")
+				return method.callMethod(interpreter, instance, values)
+			function = instance.values[cachedIndex]
+			values = [argument(env) for argument in arguments]
+			if not isinstance(function, LoxCallable):
+				raise RuntimeError(paren, "Can only call functions and classes.")
+			if len(values) != function.arity():
+				raise RuntimeError(paren, f"Expected {function.arity()} arguments but got {len(values)}.")
+			try:
+				return function.call(interpreter, values)
+			except NativeError as error:
+				raise RuntimeError(paren, error.message)
+		return invoke
+
+	def visitGetExpr(self, expr: Get):
+		obj = self.compileExpr(expr.object)
+		name = expr.name
+		lexeme = name.lexeme
+		cachedShape = None
+		cachedIndex = None
+		cachedMethod = None
+		def get(env):
+			nonlocal cachedShape, cachedIndex, cachedMethod
+			instance = obj(env)
+			if not isinstance(instance, LoxInstance):
+				raise RuntimeError(name, "Only instances have properties.")
+			if instance.shape is not cachedShape:
+				cachedIndex = instance.shape.indexes.get(lexeme)
+				cachedMethod = None
+				if cachedIndex == None:
+					cachedMethod = instance.klass.findMethod(lexeme)
+					if cachedMethod == None:
+						raise RuntimeError(name, f"Undefined property '{lexeme}'.")
+				cachedShape = instance.shape
+			if cachedMethod == None:
+				return instance.values[cachedIndex]
+			return cachedMethod.bind(instance)
+		return get
+
+	def visitGroupingExpr(self, expr: Grouping):
+		return self.compileExpr(expr.expression)
+
+	def visitIndexExpr(self, expr: Index):
+		obj = self.compileExpr(expr.object)
+		index = self.compileExpr(expr.index)
+		bracket = expr.bracket
+		def getIndex(env):
+			array = obj(env)
+			if type(array) != LoxArray and type(array) != LoxMap:
+				raise RuntimeError(bracket, "Only arrays and maps can be indexed.")
+			return array.get(bracket, index(env))
+		return getIndex
+
+	def visitLiteralExpr(self, expr: Literal):
+		value = expr.value
+		return lambda env: value
+
+	def visitLogicalExpr(self, expr: Logical):
+		left = self.compileExpr(expr.left)
+		right = self.compileExpr(expr.right)
+		if expr.operator.token_type == OR:
+			def logicalOr(env):
+				value = left(env)
+				if value is not None and value is not False: return value
+				return right(env)
+			return logicalOr
+		def logicalAnd(env):
+			value = left(env)
+			if value is None or value is False: return value
+			return right(env)
+		return logicalAnd
+
+	def visitSetExpr(self, expr: Set):
+		obj = self.compileExpr(expr.object)
+		value = self.compileExpr(expr.value)
+		name = expr.name
+		lexeme = name.lexeme
+		cachedShape = None
+		cachedIndex = None
+		cachedTransition = None
+		def set(env):
+			nonlocal cachedShape, cachedIndex, cachedTransition
+			instance = obj(env)
+			if not isinstance(instance, LoxInstance):
+				raise RuntimeError(name, "Only instances have fields.")
+			result = value(env)
+			if instance.shape is not cachedShape:
+				cachedShape = instance.shape
+				cachedIndex = cachedShape.indexes.get(lexeme)
+				cachedTransition = cachedShape.withField(lexeme) if cachedIndex == None else None
+			if cachedTransition == None:
+				instance.values[cachedIndex] = result
+			else:
+				instance.shape = cachedTransition
+				instance.values.append(result)
+			return result
+		return set
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		obj = self.compileExpr(expr.object)
+		index = self.compileExpr(expr.index)
+		value = self.compileExpr(expr.value)
+		bracket = expr.bracket
+		def setIndex(env):
+			array = obj(env)
+			if type(array) != LoxArray and type(array) != LoxMap:
+				raise RuntimeError(bracket, "Only arrays and maps can be indexed.")
+			position = index(env)
+			result = value(env)
+			array.set(bracket, position, result)
+			return result
+		return setIndex
+
+	def visitThisExpr(self, expr: This):
+		return self.local(expr.depth, expr.slot)
+
+	def visitUnaryExpr(self, expr: Unary):
+		right = self.compileExpr(expr.right)
+		operator = expr.operator
+		if operator.token_type == BANG:
+			def logicalNot(env):
+				value = right(env)
+				return value is None or value is False
+			return logicalNot
+		def negate(env):
+			value = right(env)
+			if type(value) == float: return -value
+			raise RuntimeError(operator, "Operand must be a number")
+		return negate
+
+	def visitVariableExpr(self, expr: Variable):
+		if expr.depth == None:
+			name = expr.name
+			values = self.globals.values
+			def getGlobal(env):
+				if name.lexeme in values:
+					return values[name.lexeme]
+				raise RuntimeError(name, f"Undefined variable {name.lexeme}.")
+			return getGlobal
+		return self.local(expr.depth, expr.slot)
+
+	def local(self, depth, slot):
+		if depth == 0:
+			return lambda env: env.values[slot]
+		if depth == 1:
+			return lambda env: env.enclosing.values[slot]
+		return lambda env: env.ancestor(depth).values[slot]
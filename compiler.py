@@ -0,0 +1,373 @@
+from chunk import *
+from expr import ArrayLiteral, Assign, Binary, Call, Get, Grouping, Index, Literal, Logical, Set, SetIndex, This, Unary, Variable
+from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
+from token_type import *
+
+TYPE_SCRIPT = 0
+TYPE_FUNCTION = 1
+TYPE_METHOD = 2
+
+binaryOps = {
+	BANG_EQUAL: OP_NOT_EQUAL,
+	EQUAL_EQUAL: OP_EQUAL,
+	GREATER: OP_GREATER,
+	GREATER_EQUAL: OP_GREATER_EQUAL,
+	LESS: OP_LESS,
+	LESS_EQUAL: OP_LESS_EQUAL,
+	MINUS: OP_SUBTRACT,
+	PLUS: OP_ADD,
+	SLASH: OP_DIVIDE,
+	STAR: OP_MULTIPLY,
+}
+
+constantOps = {
+	MINUS: OP_SUBTRACT_CONSTANT,
+	PLUS: OP_ADD_CONSTANT,
+}
+
+testOps = {
+	BANG_EQUAL: OP_TEST_NOT_EQUAL,
+	EQUAL_EQUAL: OP_TEST_EQUAL,
+	GREATER: OP_TEST_GREATER,
+	GREATER_EQUAL: OP_TEST_GREATER_EQUAL,
+	LESS: OP_TEST_LESS,
+	LESS_EQUAL: OP_TEST_LESS_EQUAL,
+}
+
+class CompiledFunction:
+	def __init__(self, name):
+		self.name = name
+		self.arity = 0
+		self.upvalueCount = 0
+		self.chunk = Chunk()
+
+	def __str__(self):
+		if self.name == None: return "<script>"
+		return f"<fn {self.name}>"
+
+class Local:
+	__slots__ = ("name", "depth", "isCaptured")
+
+	def __init__(self, name, depth):
+		self.name = name
+		self.depth = depth
+		self.isCaptured = False
+
+class FunctionState:
+	def __init__(self, enclosing, function, function_type):
+		self.enclosing = enclosing
+		self.function = function
+		self.function_type = function_type
+		self.upvalues = []
+		self.scopeDepth = 0
+		# Slot 0 holds the callee, or the receiver in methods.
+		self.locals = [Local("this" if function_type == TYPE_METHOD else "", 0)]
+
+class Compiler:
+	def __init__(self):
+		self.current = None
+		self.line = 1
+
+	def compile(self, statements):
+		self.current = FunctionState(None, CompiledFunction(None), TYPE_SCRIPT)
+		for statement in statements:
+			self.compileStmt(statement)
+		self.emitReturn()
+		return self.current.function
+
+	def compileStmt(self, stmt):
+		stmt.accept(self)
+
+	def compileExpr(self, expr):
+		expr.accept(self)
+
+	def visitBlockStmt(self, stmt: Block):
+		self.beginScope()
+		for statement in stmt.statements:
+			self.compileStmt(statement)
+		self.endScope()
+
+	def visitClassStmt(self, stmt: Class):
+		self.line = stmt.name.line
+		self.declareVariable(stmt.name.lexeme)
+		self.emit(OP_CLASS, self.makeConstant(stmt.name.lexeme))
+		self.defineVariable(stmt.name.lexeme)
+
+		self.namedVariable(stmt.name.lexeme, False)
+		for method in stmt.methods:
+			self.function(method, TYPE_METHOD)
+			self.emit(OP_METHOD, self.makeConstant(method.name.lexeme))
+		self.emit(OP_POP)
+
+	def visitExpressionStmt(self, stmt: Expression):
+		expr = stmt.expression
+		if type(expr) == Assign:
+			self.compileExpr(expr.value)
+			self.line = expr.name.line
+			self.namedVariable(expr.name.lexeme, True, True)
+		elif type(expr) == Set:
+			self.compileExpr(expr.object)
+			self.compileExpr(expr.value)
+			self.line = expr.name.line
+			self.emit(OP_STORE_PROPERTY, self.makeConstant(expr.name), self.makeConstant(PropertyCache()))
+		else:
+			self.compileExpr(expr)
+			self.emit(OP_POP)
+
+	def visitFunctionStmt(self, stmt: Function):
+		self.line = stmt.name.line
+		# Declared before the body so local functions can recurse.
+		self.declareVariable(stmt.name.lexeme)
+		self.function(stmt, TYPE_FUNCTION)
+		self.defineVariable(stmt.name.lexeme)
+
+	def visitIfStmt(self, stmt: If):
+		thenJump = self.condition(stmt.condition)
+		self.compileStmt(stmt.thenBranch)
+		if stmt.elseBranch == None:
+			self.patchJump(thenJump)
+			return
+		elseJump = self.emitJump(OP_JUMP)
+		self.patchJump(thenJump)
+		self.compileStmt(stmt.elseBranch)
+		self.patchJump(elseJump)
+
+	def visitPrintStmt(self, stmt: Print):
+		self.compileExpr(stmt.expression)
+		self.emit(OP_PRINT)
+
+	def visitReturnStmt(self, stmt: Return):
+		self.line = stmt.keyword.line
+		if stmt.value == None:
+			self.emit(OP_NIL)
+		else:
+			self.compileExpr(stmt.value)
+			if type(stmt.value) == Call: self.markTailCall(stmt.value)
+		self.emit(OP_RETURN)
+
+	def markTailCall(self, expr: Call):
+		# The call was the last thing emitted; rewrite its opcode so the VM
+		# runs the callee in the caller's frame.
+		code = self.chunk().code
+		if type(expr.callee) == Get:
+			code[-4] = OP_TAIL_INVOKE
+		else:
+			code[-2] = OP_TAIL_CALL
+
+	def visitVarStmt(self, stmt: Var):
+		self.line = stmt.name.line
+		if stmt.initializer == None:
+			self.emit(OP_NIL)
+		else:
+			self.compileExpr(stmt.initializer)
+		self.declareVariable(stmt.name.lexeme)
+		self.defineVariable(stmt.name.lexeme)
+
+	def visitWhileStmt(self, stmt: While):
+		loopStart = len(self.chunk().code)
+		exitJump = self.condition(stmt.condition)
+		self.compileStmt(stmt.body)
+		self.emit(OP_LOOP, loopStart)
+		self.patchJump(exitJump)
+
+	def condition(self, expr):
+		# Emits the test of an if or while and the jump taken when it fails;
+		# returns the jump for patching.
+		if type(expr) == Binary and expr.operator.token_type in testOps:
+			self.compileExpr(expr.left)
+			self.compileExpr(expr.right)
+			self.line = expr.operator.line
+			return self.emitJump(testOps[expr.operator.token_type])
+		self.compileExpr(expr)
+		return self.emitJump(OP_POP_JUMP_IF_FALSE)
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		for element in expr.elements:
+			self.compileExpr(element)
+		self.line = expr.bracket.line
+		self.emit(OP_ARRAY, len(expr.elements))
+
+	def visitAssignExpr(self, expr: Assign):
+		self.compileExpr(expr.value)
+		self.line = expr.name.line
+		self.namedVariable(expr.name.lexeme, True)
+
+	def visitBinaryExpr(self, expr: Binary):
+		self.compileExpr(expr.left)
+		if type(expr.right) == Literal and expr.operator.token_type in constantOps:
+			self.line = expr.operator.line
+			self.emit(constantOps[expr.operator.token_type], self.makeConstant(expr.right.value))
+			return
+		self.compileExpr(expr.right)
+		self.line = expr.operator.line
+		self.emit(binaryOps[expr.operator.token_type])
+
+	def visitCallExpr(self, expr: Call):
+		if type(expr.callee) == Get:
+			# obj.method(args) skips materializing a bound method.
+			self.compileExpr(expr.callee.object)
+			for argument in expr.arguments:
+				self.compileExpr(argument)
+			self.line = expr.paren.line
+			self.emit(OP_INVOKE, self.makeConstant(expr.callee.name), len(expr.arguments), self.makeConstant(PropertyCache()))
+			return
+		self.compileExpr(expr.callee)
+		for argument in expr.arguments:
+			self.compileExpr(argument)
+		self.line = expr.paren.line
+		self.emit(OP_CALL, len(expr.arguments))
+
+	def visitGetExpr(self, expr: Get):
+		self.compileExpr(expr.object)
+		self.line = expr.name.line
+		self.emit(OP_GET_PROPERTY, self.makeConstant(expr.name), self.makeConstant(PropertyCache()))
+
+	def visitGroupingExpr(self, expr: Grouping):
+		self.compileExpr(expr.expression)
+
+	def visitIndexExpr(self, expr: Index):
+		self.compileExpr(expr.object)
+		self.compileExpr(expr.index)
+		self.line = expr.bracket.line
+		self.emit(OP_GET_INDEX, self.makeConstant(expr.bracket))
+
+	def visitLiteralExpr(self, expr: Literal):
+		if expr.value == None:
+			self.emit(OP_NIL)
+		elif expr.value is True:
+			self.emit(OP_TRUE)
+		elif expr.value is False:
+			self.emit(OP_FALSE)
+		else:
+			self.emit(OP_CONSTANT, self.makeConstant(expr.value))
+
+	def visitLogicalExpr(self, expr: Logical):
+		self.compileExpr(expr.left)
+		self.line = expr.operator.line
+		endJump = self.emitJump(OP_JUMP_IF_TRUE if expr.operator.token_type == OR else OP_JUMP_IF_FALSE)
+		self.emit(OP_POP)
+		self.compileExpr(expr.right)
+		self.patchJump(endJump)
+
+	def visitSetExpr(self, expr: Set):
+		self.compileExpr(expr.object)
+		self.compileExpr(expr.value)
+		self.line = expr.name.line
+		self.emit(OP_SET_PROPERTY, self.makeConstant(expr.name), self.makeConstant(PropertyCache()))
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		self.compileExpr(expr.object)
+		self.compileExpr(expr.index)
+		self.compileExpr(expr.value)
+		self.line = expr.bracket.line
+		self.emit(OP_SET_INDEX, self.makeConstant(expr.bracket))
+
+	def visitThisExpr(self, expr: This):
+		self.line = expr.keyword.line
+		self.namedVariable("this", False)
+
+	def visitUnaryExpr(self, expr: Unary):
+		self.compileExpr(expr.right)
+		self.line = expr.operator.line
+		if expr.operator.token_type == BANG:
+			self.emit(OP_NOT)
+		else:
+			self.emit(OP_NEGATE)
+
+	def visitVariableExpr(self, expr: Variable):
+		self.line = expr.name.line
+		self.namedVariable(expr.name.lexeme, False)
+
+	def function(self, stmt: Function, function_type):
+		state = FunctionState(self.current, CompiledFunction(stmt.name.lexeme), function_type)
+		self.current = state
+		self.beginScope()
+		state.function.arity = len(stmt.params)
+		for param in stmt.params:
+			state.locals.append(Local(param.lexeme, state.scopeDepth))
+		for statement in stmt.body:
+			self.compileStmt(statement)
+		self.emitReturn()
+		self.current = state.enclosing
+
+		function = state.function
+		function.upvalueCount = len(state.upvalues)
+		self.emit(OP_CLOSURE, self.makeConstant(function))
+		for index, isLocal in state.upvalues:
+			self.emit(1 if isLocal else 0, index)
+
+	def namedVariable(self, name, assign, store=False):
+		# store: an assignment statement, which leaves nothing on the stack.
+		arg = self.resolveLocal(self.current, name)
+		if arg != -1:
+			self.emit(OP_GET_LOCAL if not assign else OP_STORE_LOCAL if store else OP_SET_LOCAL, arg)
+			return
+		arg = self.resolveUpvalue(self.current, name)
+		if arg != -1:
+			self.emit(OP_GET_UPVALUE if not assign else OP_STORE_UPVALUE if store else OP_SET_UPVALUE, arg)
+			return
+		self.emit(OP_GET_GLOBAL if not assign else OP_STORE_GLOBAL if store else OP_SET_GLOBAL, self.makeConstant(name))
+
+	def resolveLocal(self, state, name):
+		for i in range(len(state.locals) - 1, -1, -1):
+			if state.locals[i].name == name:
+				return i
+		return -1
+
+	def resolveUpvalue(self, state, name):
+		if state.enclosing == None: return -1
+		local = self.resolveLocal(state.enclosing, name)
+		if local != -1:
+			state.enclosing.locals[local].isCaptured = True
+			return self.addUpvalue(state, local, True)
+		upvalue = self.resolveUpvalue(state.enclosing, name)
+		if upvalue != -1:
+			return self.addUpvalue(state, upvalue, False)
+		return -1
+
+	def addUpvalue(self, state, index, isLocal):
+		if (index, isLocal) in state.upvalues:
+			return state.upvalues.index((index, isLocal))
+		state.upvalues.append((index, isLocal))
+		return len(state.upvalues) - 1
+
+	def declareVariable(self, name):
+		# Locals live on the VM stack; the value being declared is already on top.
+		if self.current.scopeDepth == 0: return
+		self.current.locals.append(Local(name, self.current.scopeDepth))
+
+	def defineVariable(self, name):
+		if self.current.scopeDepth > 0: return
+		self.emit(OP_DEFINE_GLOBAL, self.makeConstant(name))
+
+	def beginScope(self):
+		self.current.scopeDepth += 1
+
+	def endScope(self):
+		state = self.current
+		state.scopeDepth -= 1
+		while len(state.locals) > 0 and state.locals[-1].depth > state.scopeDepth:
+			self.emit(OP_CLOSE_UPVALUE if state.locals[-1].isCaptured else OP_POP)
+			state.locals.pop()
+
+	def chunk(self):
+		return self.current.function.chunk
+
+	def makeConstant(self, value):
+		return self.chunk().addConstant(value)
+
+	def emit(self, *code):
+		chunk = self.chunk()
+		for byte in code:
+			chunk.write(byte, self.line)
+
+	def emitJump(self, instruction):
+		self.emit(instruction, 0)
+		return len(self.chunk().code) - 1
+
+	def patchJump(self, offset):
+		# Jumps hold absolute targets within the function's code.
+		self.chunk().code[offset] = len(self.chunk().code)
+
+	def emitReturn(self):
+		self.emit(OP_NIL, OP_RETURN)
@@ -0,0 +1,4 @@
+# What executing a statement hands back when a return statement ran inside
+# it, instead of None; the returned value waits on the interpreter. No Lox
+# value is ever this object, so an identity test is enough.
+RETURN = object()
@@ -2,7 +2,7 @@ class Enviroment:
 	def __init__(self, enclosing=None):
 		self.enclosing: Enviroment = enclosing
 		self.values = {}
-	
+
 	def define(self, name, value):
 		self.values[name] = value
 
@@ -13,14 +13,38 @@ class Enviroment:
 		if self.enclosing != None: return self.enclosing.get(name)
 
 		raise RuntimeError(name, f"Undefined variable {name.lexeme}.")
-	
+
 	def assign(self, name, value):
 		if name.lexeme in self.values:
 			self.values[name.lexeme] = value
-			return 
-		
+			return
+
 		if self.enclosing != None:
 			self.enclosing.assign(name, value)
 			return
 
-		raise RuntimeError(name, f"Undefined variable {name.lexeme}.")
\ No newline at end of file
+		raise RuntimeError(name, f"Undefined variable {name.lexeme}.")
+
+
+class LocalEnviroment:
+	# Block and call scopes once the resolver has numbered their variables:
+	# values is a list indexed by slot, sized from the scope's declaration count.
+	__slots__ = ("enclosing", "values")
+
+	def __init__(self, enclosing, values):
+		self.enclosing = enclosing
+		self.values = values
+
+	def ancestor(self, distance):
+		environment = self
+		while distance:
+			environment = environment.enclosing
+			distance -= 1
+		return environment
+
+	def getAt(self, distance, slot):
+		if distance == 0: return self.values[slot]
+		return self.ancestor(distance).values[slot]
+
+	def assignAt(self, distance, slot, value):
+		self.ancestor(distance).values[slot] = value
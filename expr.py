@@ -1,17 +1,31 @@
-from abc import ABC
-
-class Expr(ABC):
-    pass
+class Expr:
+    __slots__ = ()
 
 class Assign(Expr):
-    def __init__(self, name, value):
+    __slots__ = ("name", "value", "depth", "slot")
+
+    def __init__(self, name, value, depth=None, slot=None):
         self.name = name
         self.value = value
+        self.depth = depth
+        self.slot = slot
 
     def accept(self, visitor):
         return visitor.visitAssignExpr(self)
 
+class ArrayLiteral(Expr):
+    __slots__ = ("bracket", "elements")
+
+    def __init__(self, bracket, elements):
+        self.bracket = bracket
+        self.elements = elements
+
+    def accept(self, visitor):
+        return visitor.visitArrayLiteralExpr(self)
+
 class Binary(Expr):
+    __slots__ = ("left", "operator", "right")
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -21,32 +35,70 @@ class Binary(Expr):
         return visitor.visitBinaryExpr(self)
 
 class Call(Expr):
-    def __init__(self, callee, paren, arguments):
+    __slots__ = ("callee", "paren", "arguments", "cachedFunction")
+
+    def __init__(self, callee, paren, arguments, cachedFunction=None):
         self.callee = callee
         self.paren = paren
         self.arguments = arguments
+        self.cachedFunction = cachedFunction
 
     def accept(self, visitor):
         return visitor.visitCallExpr(self)
 
 class Get(Expr):
-    def __init__(self, object, name):
+    __slots__ = ("object", "name", "cachedShape", "cachedIndex", "cachedMethod")
+
+    def __init__(self, object, name, cachedShape=None, cachedIndex=None, cachedMethod=None):
         self.object = object
         self.name = name
+        self.cachedShape = cachedShape
+        self.cachedIndex = cachedIndex
+        self.cachedMethod = cachedMethod
 
     def accept(self, visitor):
         return visitor.visitGetExpr(self)
 
 class Set(Expr):
-    def __init__(self, object, name, value):
+    __slots__ = ("object", "name", "value", "cachedShape", "cachedIndex", "cachedTransition")
+
+    def __init__(self, object, name, value, cachedShape=None, cachedIndex=None, cachedTransition=None):
         self.object = object
         self.name = name
         self.value = value
+        self.cachedShape = cachedShape
+        self.cachedIndex = cachedIndex
+        self.cachedTransition = cachedTransition
 
     def accept(self, visitor):
         return visitor.visitSetExpr(self)
 
+class Index(Expr):
+    __slots__ = ("object", "bracket", "index")
+
+    def __init__(self, object, bracket, index):
+        self.object = object
+        self.bracket = bracket
+        self.index = index
+
+    def accept(self, visitor):
+        return visitor.visitIndexExpr(self)
+
+class SetIndex(Expr):
+    __slots__ = ("object", "bracket", "index", "value")
+
+    def __init__(self, object, bracket, index, value):
+        self.object = object
+        self.bracket = bracket
+        self.index = index
+        self.value = value
+
+    def accept(self, visitor):
+        return visitor.visitSetIndexExpr(self)
+
 class Grouping(Expr):
+    __slots__ = ("expression",)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -54,6 +106,8 @@ class Grouping(Expr):
         return visitor.visitGroupingExpr(self)
 
 class Literal(Expr):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
@@ -61,6 +115,8 @@ class Literal(Expr):
         return visitor.visitLiteralExpr(self)
 
 class Logical(Expr):
+    __slots__ = ("left", "operator", "right")
+
     def __init__(self, left, operator, right):
         self.left = left
         self.operator = operator
@@ -70,6 +126,8 @@ class Logical(Expr):
         return visitor.visitLogicalExpr(self)
 
 class Unary(Expr):
+    __slots__ = ("operator", "right")
+
     def __init__(self, operator, right):
         self.operator = operator
         self.right = right
@@ -78,16 +136,114 @@ class Unary(Expr):
         return visitor.visitUnaryExpr(self)
 
 class This(Expr):
-    def __init__(self, keyword):
+    __slots__ = ("keyword", "depth", "slot")
+
+    def __init__(self, keyword, depth=None, slot=None):
         self.keyword = keyword
+        self.depth = depth
+        self.slot = slot
 
     def accept(self, visitor):
         return visitor.visitThisExpr(self)
 
 class Variable(Expr):
-    def __init__(self, name):
+    __slots__ = ("name", "depth", "slot")
+
+    def __init__(self, name, depth=None, slot=None):
         self.name = name
+        self.depth = depth
+        self.slot = slot
 
     def accept(self, visitor):
         return visitor.visitVariableExpr(self)
 
+class Add(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitAddExpr(self)
+
+class Subtract(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitSubtractExpr(self)
+
+class Multiply(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitMultiplyExpr(self)
+
+class Divide(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitDivideExpr(self)
+
+class Greater(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitGreaterExpr(self)
+
+class GreaterEqual(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitGreaterEqualExpr(self)
+
+class Less(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitLessExpr(self)
+
+class LessEqual(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitLessEqualExpr(self)
+
+class Equal(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitEqualExpr(self)
+
+class NotEqual(Binary):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitNotEqualExpr(self)
+
+class AddNumbers(Add):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitAddNumbersExpr(self)
+
+class AddStrings(Add):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitAddStringsExpr(self)
+
+class AddGeneric(Add):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitAddGenericExpr(self)
+
+class Invoke(Call):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitInvokeExpr(self)
+
+class FunctionCall(Call):
+    __slots__ = ()
+
+    def accept(self, visitor):
+        return visitor.visitFunctionCallExpr(self)
+
@@ -2,50 +2,76 @@
 from email.mime import base
 
 
-def defineAst(base_class:str, types):
+def defineAst(base_class:str, types, subtypes={}):
 	out_path = f"{base_class.lower()}.py"
 	with open(out_path, "w") as file:
-		file.write("from abc import ABC\n\n")
-		file.write(f"class {base_class}(ABC):\n")
-		file.write(f"    pass\n\n")
+		# Nodes are plain classes with __slots__: no per-instance __dict__,
+		# so every field the later passes fill in has to be listed here.
+		file.write(f"class {base_class}:\n")
+		file.write(f"    __slots__ = ()\n\n")
 		
 		for key, value in types.items():
 			attr = ', '.join(value)
+			names = [f'"{attr.split("=")[0]}"' for attr in value]
+			slots = ', '.join(names) + ("," if len(names) == 1 else "")
 			file.write(f"class {key}({base_class}):\n")
+			file.write(f"    __slots__ = ({slots})\n\n")
 			file.write(f"    def __init__(self, {attr}):\n")
 			for attr in value:
+				attr = attr.split("=")[0]
 				file.write(f"        self.{attr} = {attr}\n")
 			file.write('\n')
 			file.write(f"    def accept(self, visitor):\n")
 			file.write(f"        return visitor.visit{key}{base_class}(self)\n")
 			file.write("\n")
 
+		# Subtypes share their parent's fields and only change which visit
+		# method accept calls.
+		for parent, keys in subtypes.items():
+			for key in keys:
+				file.write(f"class {key}({parent}):\n")
+				file.write(f"    __slots__ = ()\n\n")
+				file.write(f"    def accept(self, visitor):\n")
+				file.write(f"        return visitor.visit{key}{base_class}(self)\n")
+				file.write("\n")
+
 
 def main():
 	types = {
-		"Assign": ["name", "value"],
+		"Assign": ["name", "value", "depth=None", "slot=None"],
+		"ArrayLiteral": ["bracket", "elements"],
 		"Binary": ["left", "operator", "right"],
-		"Call": ["callee", "paren", "arguments"],
-		"Get": ["object", "name"],
-		"Set": ["object", "name", "value"],
+		"Call": ["callee", "paren", "arguments", "cachedFunction=None"],
+		"Get": ["object", "name", "cachedShape=None", "cachedIndex=None", "cachedMethod=None"],
+		"Set": ["object", "name", "value", "cachedShape=None", "cachedIndex=None", "cachedTransition=None"],
+		"Index": ["object", "bracket", "index"],
+		"SetIndex": ["object", "bracket", "index", "value"],
 		"Grouping": ["expression"],
 		"Literal": ["value"],
 		"Logical": ["left", "operator", "right"],
 		"Unary": ["operator", "right"],
-		"This": ["keyword"],
-		"Variable": ["name"]
+		"This": ["keyword", "depth=None", "slot=None"],
+		"Variable": ["name", "depth=None", "slot=None"]
+	}
+	# The tree-walking interpreter rewrites nodes into these subtypes while it
+	# runs, from their operator and the values it sees; no other pass sees them.
+	subtypes = {
+		"Binary": ["Add", "Subtract", "Multiply", "Divide", "Greater", "GreaterEqual",
+			"Less", "LessEqual", "Equal", "NotEqual"],
+		"Add": ["AddNumbers", "AddStrings", "AddGeneric"],
+		"Call": ["Invoke", "FunctionCall"]
 	}
-	defineAst("Expr", types)
+	defineAst("Expr", types, subtypes)
 	defineAst(
 		"Stmt", {
-			"Block": ["statements"],
-			"Class": ["name", "methods"],
+			"Block": ["statements", "size=0"],
+			"Class": ["name", "methods", "slot=None"],
 			"Expression": ["expression"], 
-			"Function": ["name", "params", "body"],
+			"Function": ["name", "params", "body", "slot=None", "size=0"],
 			"If": ["condition", "thenBranch", "elseBranch"],
 			"Print": ["expression"],
 			"Return": ["keyword","value"],
-			"Var": ["name", "initializer"],
+			"Var": ["name", "initializer", "slot=None"],
 			"While": ["condition", "body"]
 			}
 	)
@@ -1,15 +1,315 @@
+from loxarray import LoxArray
 from loxcallable import LoxCallable
+from loxmap import LoxMap
+from loxvec import LoxVec
+import importlib.util
+import math
 import time
+import types
 
-class Clock(LoxCallable):
-	def __init__(self):
-		pass
+class NativeError(Exception):
+	# Raised by a native for bad arguments; the engine that made the call
+	# reports it as a runtime error at the call site.
+	def __init__(self, message):
+		super().__init__(message)
+		self.message = message
+
+class NativeFunction(LoxCallable):
+	def __init__(self, name, arity, function, needsInterpreter=False):
+		self.name = name
+		self.argCount = arity
+		self.function = function
+		self.needsInterpreter = needsInterpreter
 
 	def arity(self):
-		return 0
-	
+		return self.argCount
+
 	def call(self, interpreter, arguments):
-		return time.time()
+		if self.needsInterpreter: return self.function(interpreter, *arguments)
+		return self.function(*arguments)
+
+	def __str__(self):
+		return "<native fn>"
+
+# Every Interpreter defines these as globals when it is created. Register
+# more from Python with the decorator before creating one:
+#
+#   @native("hypot", 2)
+#   def hypot(x, y):
+#       return math.hypot(number("hypot", x), number("hypot", y))
+#
+# With needsInterpreter=True the function also gets the running engine
+# first, which it needs to call back into Lox with callback().
+natives = {}
+
+def native(name, arity, needsInterpreter=False):
+	def register(function):
+		natives[name] = NativeFunction(name, arity, function, needsInterpreter)
+		return function
+	return register
+
+def number(name, value):
+	if type(value) != float: raise NativeError(f"{name} expects a number.")
+	return value
+
+def whole(name, value):
+	if type(value) != float or not value.is_integer(): raise NativeError(f"{name} expects a whole number.")
+	return int(value)
+
+def string(name, value):
+	if type(value) != str: raise NativeError(f"{name} expects a string.")
+	return value
+
+def array(name, value):
+	if type(value) != LoxArray: raise NativeError(f"{name} expects an array.")
+	return value.elements
+
+def dictionary(name, value):
+	if type(value) != LoxMap: raise NativeError(f"{name} expects a map.")
+	return value.entries
+
+def key(name, value):
+	# The key a LoxMap stores value's entry under.
+	if type(value) not in LoxMap.keyTypes: raise NativeError(f"{name} expects a string, number, boolean or nil key.")
+	return (type(value), value)
+
+def callback(interpreter, name, function, *arguments):
+	# Calls a function value handed to a native. The py engine's Lox
+	# functions are plain Python functions; everything else is LoxCallable.
+	if isinstance(function, LoxCallable):
+		arity = function.arity()
+	elif type(function) == types.FunctionType:
+		arity = function.__code__.co_argcount
+	elif type(function) == types.MethodType:
+		arity = function.__func__.__code__.co_argcount - 1
+	else:
+		raise NativeError(f"{name} expects a function.")
+	if arity != len(arguments):
+		raise NativeError(f"{name} expects a function of {len(arguments)} argument{'' if len(arguments) == 1 else 's'}.")
+	if isinstance(function, LoxCallable):
+		return function.call(interpreter, list(arguments))
+	return function(*arguments)
+
+def stringify(object):
+	if object == None: return "nil"
+
+	if type(object) == float:
+		text = str(object)
+		if text.endswith(".0"):
+			text = text[0: len(text) - 2]	
+		return text
+
+	if type(object) == LoxArray:
+		return "[" + ", ".join(stringify(element) for element in object.elements) + "]"
+
+	if type(object) == LoxMap:
+		return "{" + ", ".join(f"{stringify(key)}: {stringify(value)}" for (keyType, key), value in object.entries.items()) + "}"
+
+	if type(object) == LoxVec:
+		return "vec[" + ", ".join(stringify(value) for value in object.values.tolist()) + "]"
+
+	if type(object) == types.FunctionType or type(object) == types.MethodType:
+		return f"<fn {object.__name__}>"
+	
+	return str(object)
+
+@native("clock", 0)
+def clock():
+	return time.time()
+
+@native("sqrt", 1)
+def sqrt(x):
+	x = number("sqrt", x)
+	if x < 0: raise NativeError("sqrt of a negative number.")
+	return math.sqrt(x)
+
+@native("floor", 1)
+def floor(x):
+	x = number("floor", x)
+	if not math.isfinite(x): return x
+	return float(math.floor(x))
+
+@native("pow", 2)
+def power(x, y):
+	try:
+		return math.pow(number("pow", x), number("pow", y))
+	except (ValueError, OverflowError) as error:
+		raise NativeError(f"pow: {error}.")
+
+@native("min", 2)
+def minimum(a, b):
+	return min(number("min", a), number("min", b))
+
+@native("max", 2)
+def maximum(a, b):
+	return max(number("max", a), number("max", b))
+
+@native("len", 1)
+def length(value):
+	if type(value) == LoxArray: return float(len(value.elements))
+	if type(value) == LoxVec: return float(len(value.values))
+	if type(value) != str: raise NativeError("len expects a string, an array or a vector.")
+	return float(len(value))
+
+@native("substr", 3)
+def substr(s, start, count):
+	s = string("substr", s)
+	start = whole("substr", start)
+	count = whole("substr", count)
+	if start < 0 or count < 0 or start + count > len(s): raise NativeError("substr out of range.")
+	return s[start:start + count]
+
+@native("indexOf", 2)
+def indexOf(s, part):
+	return float(string("indexOf", s).find(string("indexOf", part)))
+
+@native("upper", 1)
+def upper(s):
+	return string("upper", s).upper()
+
+@native("num", 1)
+def toNumber(value):
+	# Numbers pass through; strings are parsed, nil if they are not numbers.
+	if type(value) == float: return value
+	try:
+		number = float(string("num", value))
+	except ValueError:
+		return None
+	if math.isfinite(number): return number
+	return None
+
+@native("str", 1)
+def toString(value):
+	return stringify(value)
+
+@native("push", 2)
+def push(a, value):
+	array("push", a).append(value)
+	return None
+
+@native("pop", 1)
+def pop(a):
+	elements = array("pop", a)
+	if len(elements) == 0: raise NativeError("pop from an empty array.")
+	return elements.pop()
+
+@native("slice", 3)
+def slice(a, start, end):
+	# Vectors slice to a vector sharing their storage; they are immutable.
+	elements = a.values if type(a) == LoxVec else array("slice", a)
+	start = whole("slice", start)
+	end = whole("slice", end)
+	if start < 0 or start > end or end > len(elements): raise NativeError("slice out of range.")
+	if type(a) == LoxVec: return LoxVec(elements[start:end])
+	return LoxArray(elements[start:end])
+
+@native("sort", 1)
+def sort(a):
+	# In place, like push and pop; numbers and strings do not mix.
+	elements = array("sort", a)
+	kinds = set(type(element) for element in elements)
+	if not (kinds <= {float} or kinds <= {str}): raise NativeError("sort expects all numbers or all strings.")
+	elements.sort()
+	return a
+
+@native("map", 2, needsInterpreter=True)
+def mapArray(interpreter, a, function):
+	return LoxArray([callback(interpreter, "map", function, element) for element in list(array("map", a))])
+
+@native("filter", 2, needsInterpreter=True)
+def filterArray(interpreter, a, function):
+	result = []
+	for element in list(array("filter", a)):
+		keep = callback(interpreter, "filter", function, element)
+		if keep is not None and keep is not False: result.append(element)
+	return LoxArray(result)
+
+@native("reduce", 3, needsInterpreter=True)
+def reduceArray(interpreter, a, function, initial):
+	value = initial
+	for element in list(array("reduce", a)):
+		value = callback(interpreter, "reduce", function, value, element)
+	return value
+
+@native("split", 2)
+def split(s, separator):
+	s = string("split", s)
+	separator = string("split", separator)
+	if separator == "": return LoxArray(list(s))
+	return LoxArray(s.split(separator))
+
+@native("join", 2)
+def join(a, separator):
+	return string("join", separator).join(stringify(element) for element in array("join", a))
+
+@native("Map", 0)
+def makeMap():
+	return LoxMap({})
+
+@native("keys", 1)
+def keys(m):
+	return LoxArray([key for keyType, key in dictionary("keys", m)])
+
+@native("values", 1)
+def values(m):
+	return LoxArray(list(dictionary("values", m).values()))
+
+@native("has", 2)
+def has(m, k):
+	return key("has", k) in dictionary("has", m)
+
+@native("remove", 2)
+def remove(m, k):
+	# The removed value, or nil if the key was not there.
+	return dictionary("remove", m).pop(key("remove", k), None)
+
+@native("size", 1)
+def size(m):
+	return float(len(dictionary("size", m)))
+
+# Vectors only exist when NumPy is installed, and NumPy is only imported
+# the first time one is made.
+if importlib.util.find_spec("numpy") != None:
+	def vector(name, value):
+		if type(value) != LoxVec: raise NativeError(f"{name} expects a vector.")
+		return value.values
+
+	@native("vec", 1)
+	def vec(a):
+		import numpy
+		elements = array("vec", a)
+		if any(type(element) != float for element in elements): raise NativeError("vec expects an array of numbers.")
+		return LoxVec(numpy.array(elements, dtype=numpy.float64))
+
+	@native("toArray", 1)
+	def toArray(v):
+		return LoxArray(vector("toArray", v).tolist())
+
+	@native("sum", 1)
+	def vectorSum(v):
+		return float(vector("sum", v).sum())
+
+	@native("mean", 1)
+	def mean(v):
+		values = vector("mean", v)
+		if len(values) == 0: raise NativeError("mean of an empty vector.")
+		return float(values.mean())
+
+	@native("dot", 2)
+	def dot(a, b):
+		a = vector("dot", a)
+		b = vector("dot", b)
+		if len(a) != len(b): raise NativeError("dot expects vectors of the same length.")
+		return float(a.dot(b))
+
+	@native("vmin", 1)
+	def vectorMin(v):
+		values = vector("vmin", v)
+		if len(values) == 0: raise NativeError("vmin of an empty vector.")
+		return float(values.min())
 
-	def toString(self):
-		return "<native fn>"
\ No newline at end of file
+	@native("vmax", 1)
+	def vectorMax(v):
+		values = vector("vmax", v)
+		if len(values) == 0: raise NativeError("vmax of an empty vector.")
+		return float(values.max())
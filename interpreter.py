@@ -1,20 +1,42 @@
-from enviroment import Enviroment
+from enviroment import Enviroment, LocalEnviroment
 from expr import *
 from loxcallable import LoxCallable
 from loxclass import LoxClass
 from loxfunction import LoxFunction
+from loxarray import LoxArray
 from loxinstance import LoxInstance
+from loxmap import LoxMap
+from loxvec import LoxVec, elementwise
 from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
 from token_type import *
 from tokens import Token
-from globals import Clock
-from returnexecption import ReturnException
+from globals import NativeError, natives, stringify
+from output import Output
+from completion import RETURN
+
+binaryNodes = {
+	BANG_EQUAL: NotEqual,
+	EQUAL_EQUAL: Equal,
+	GREATER: Greater,
+	GREATER_EQUAL: GreaterEqual,
+	LESS: Less,
+	LESS_EQUAL: LessEqual,
+	MINUS: Subtract,
+	PLUS: Add,
+	SLASH: Divide,
+	STAR: Multiply,
+}
 
 class Interpreter:
+	functionClass = LoxFunction
+
 	def __init__(self):
 		self.globals = Enviroment()
 		self.environment = self.globals
-		self.globals.define("clock", Clock())
+		self.returnValue = None
+		self.output = Output()
+		for name, function in natives.items():
+			self.globals.define(name, function)
 
 	def interpret(self, statements, lox):
 		try:
@@ -36,62 +58,104 @@ class Interpreter:
 			return not self.isTruthy(right)
 
 		if expr.operator.token_type == MINUS:
+			self.checkNumberOperand(expr.operator, right)
 			return -float(right)
 
 		return None
 
 	def visitWhileStmt(self, stmt: While):
 		while self.isTruthy(self.evaluate(stmt.condition)):
-			self.execute(stmt.body)
+			if self.execute(stmt.body) is RETURN: return RETURN
 		return None
 
 	def visitBinaryExpr(self, expr: Binary):
-		left = self.evaluate(expr.left)
-		right = self.evaluate(expr.right)
-
-		operator = expr.operator.token_type
-
-		if operator == GREATER:
-			self.checkNumberOperands(expr.operator, left, right)
-			return float(left) > float(right)
-
-		if operator == GREATER_EQUAL:
-			self.checkNumberOperands(expr.operator, left, right)
-			return float(left) >= float(right)
-
-		if operator == LESS:
-			self.checkNumberOperands(expr.operator, left, right)
-			return float(left) < float(right)
-		
-		if operator == LESS_EQUAL:
-			self.checkNumberOperands(expr.operator, left, right)
-			return float(left) <= float(right)
-
-		if operator == BANG_EQUAL: return not self.isEqual(left, right)
-		if operator == EQUAL_EQUAL: return self.isEqual(left, right)
-
-		if operator == MINUS:
-			self.checkNumberOperand(expr.operator, right)
-			return float(left) - float(right)
-		
-		if operator == PLUS:
-			if(type(left) == float and type(right) == float):
-				return float(left) + float(right)
-
-			if(type(left) == str and type(right) == str):
-				return str(left) + str(right)
-
-			raise RuntimeError(expr.operator, "Operator must be two numbers or two strings.")
-
-		if operator == SLASH:
-			self.checkNumberOperands(expr.operator, left, right)
-			return float(left) / float(right)
+		# First evaluation: the node becomes the subclass for its operator, so
+		# from then on accept goes straight to that operator's code. Those
+		# call accept on their operands themselves rather than via evaluate.
+		expr.__class__ = binaryNodes[expr.operator.token_type]
+		return expr.accept(self)
 
-		if operator == STAR:
-			self.checkNumberOperands(expr.operator, left, right)
-			return float(left) * float(right)
-
-		return None
+	def visitAddExpr(self, expr: Add):
+		# Not run yet: becomes AddNumbers or AddStrings after the operands
+		# it first sees, and AddGeneric for good once that guess fails.
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float:
+			expr.__class__ = AddNumbers
+		elif type(left) == str and type(right) == str:
+			expr.__class__ = AddStrings
+		return self.add(expr, left, right)
+
+	def visitAddNumbersExpr(self, expr: AddNumbers):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) is float and type(right) is float: return left + right
+		expr.__class__ = AddGeneric
+		return self.add(expr, left, right)
+
+	def visitAddStringsExpr(self, expr: AddStrings):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) is str and type(right) is str: return left + right
+		expr.__class__ = AddGeneric
+		return self.add(expr, left, right)
+
+	def visitAddGenericExpr(self, expr: AddGeneric):
+		return self.add(expr, expr.left.accept(self), expr.right.accept(self))
+
+	def add(self, expr: Binary, left, right):
+		if type(left) == float and type(right) == float: return left + right
+		if type(left) == str and type(right) == str: return left + right
+		if type(left) == LoxVec or type(right) == LoxVec: return elementwise(expr.operator, left, right)
+		raise RuntimeError(expr.operator, "Operator must be two numbers or two strings.")
+
+	def visitSubtractExpr(self, expr: Subtract):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float: return left - right
+		return self.arithmetic(expr.operator, left, right)
+
+	def visitMultiplyExpr(self, expr: Multiply):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float: return left * right
+		return self.arithmetic(expr.operator, left, right)
+
+	def visitDivideExpr(self, expr: Divide):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float: return left / right
+		return self.arithmetic(expr.operator, left, right)
+
+	def visitGreaterExpr(self, expr: Greater):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float: return left > right
+		self.checkNumberOperands(expr.operator, left, right)
+
+	def visitGreaterEqualExpr(self, expr: GreaterEqual):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float: return left >= right
+		self.checkNumberOperands(expr.operator, left, right)
+
+	def visitLessExpr(self, expr: Less):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float: return left < right
+		self.checkNumberOperands(expr.operator, left, right)
+
+	def visitLessEqualExpr(self, expr: LessEqual):
+		left = expr.left.accept(self)
+		right = expr.right.accept(self)
+		if type(left) == float and type(right) == float: return left <= right
+		self.checkNumberOperands(expr.operator, left, right)
+
+	def visitEqualExpr(self, expr: Equal):
+		return self.isEqual(expr.left.accept(self), expr.right.accept(self))
+
+	def visitNotEqualExpr(self, expr: NotEqual):
+		return not self.isEqual(expr.left.accept(self), expr.right.accept(self))
 
 	def visitExpressionStmt(self, stmt: Expression):
 		self.evaluate(stmt.expression)
@@ -99,74 +163,148 @@ class Interpreter:
 
 	def visitPrintStmt(self, stmt: Print):
 		value = self.evaluate(stmt.expression)
-		print(self.stringify(value))
+		self.output.writeLine(self.stringify(value))
 		return None
 
 	def visitReturnStmt(self, stmt: Return):
 		value = None
 		if stmt.value != None: value = self.evaluate(stmt.value)
-		raise ReturnException(value)
+		self.returnValue = value
+		return RETURN
 
 	def visitVarStmt(self, stmt: Var):
 		value = None
 		if stmt.initializer != None:
 			value = self.evaluate(stmt.initializer)
-		self.environment.define(stmt.name.lexeme, value)
+		self.define(stmt.slot, stmt.name, value)
 		return None
 
 	def visitVariableExpr(self, expr: Variable):
-		return self.environment.get(expr.name)	
+		return self.lookupVariable(expr.name, expr)
 
 	def visitAssignExpr(self, expr: Assign):
 		value = self.evaluate(expr.value)
-		self.environment.assign(expr.name, value)
+		if expr.depth != None:
+			self.environment.assignAt(expr.depth, expr.slot, value)
+		else:
+			self.globals.assign(expr.name, value)
 		return value
 
 	def visitCallExpr(self, expr: Call):
+		# Call sites rewrite themselves on first use: obj.method(args) into an
+		# Invoke, and a call that finds a plain Lox function into a
+		# FunctionCall for that function. A FunctionCall that later meets a
+		# anything else turns back into a Call and stays one.
+		if type(expr.callee) == Get:
+			expr.__class__ = Invoke
+			return self.visitInvokeExpr(expr)
 		callee = self.evaluate(expr.callee)
 		arguments = []
 		for argument in expr.arguments:
 			arguments.append(self.evaluate(argument))
+		if type(callee) == LoxFunction and callee.receiver == None and expr.cachedFunction == None:
+			if len(arguments) == callee.arity():
+				expr.cachedFunction = callee.declaration
+				expr.__class__ = FunctionCall
+		return self.callValue(expr, callee, arguments)
+
+	def visitFunctionCallExpr(self, expr: FunctionCall):
+		# Guarded on the declaration rather than the LoxFunction, so closures
+		# made afresh on each run of their enclosing function still hit. The
+		# arity was checked against this declaration when the site was cached.
+		callee = expr.callee.accept(self)
+		arguments = [argument.accept(self) for argument in expr.arguments]
+		if type(callee) is LoxFunction and callee.declaration is expr.cachedFunction:
+			declaration = expr.cachedFunction
+			locals = declaration.size - len(arguments)
+			if locals: arguments += [None] * locals
+			# LoxFunction.call and executeBlock, inlined.
+			previous = self.environment
+			self.environment = LocalEnviroment(callee.closure, arguments)
+			try:
+				for statement in declaration.body:
+					if statement.accept(self) is RETURN: return self.returnValue
+			finally:
+				self.environment = previous
+			return None
+		expr.__class__ = Call
+		return self.callValue(expr, callee, arguments)
+
+	def visitInvokeExpr(self, expr: Invoke):
+		get = expr.callee
+		obj = self.evaluate(get.object)
+		if not isinstance(obj, LoxInstance):
+			raise RuntimeError(get.name, "Only instances have properties.")
+		if obj.shape is not get.cachedShape: self.cacheProperty(obj, get)
+		method = get.cachedMethod
+		arguments = [self.evaluate(argument) for argument in expr.arguments]
+		if method != None:
+			# obj.method(args): call the method with obj as 'this' rather
+			# than binding a function only to call it once.
+			if len(arguments) != method.arity():
+				raise RuntimeError(expr.paren, f"Expected {method.arity()} arguments but got {len(arguments)}.")
+			return method.callMethod(self, obj, arguments)
+		return self.callValue(expr, obj.values[get.cachedIndex], arguments)
+
+	def callValue(self, expr: Call, callee, arguments):
 		if not isinstance(callee, LoxCallable):
 			raise RuntimeError(expr.paren, "Can only call functions and classes.")
 		function = callee
 		if len(arguments) != function.arity():
 			raise RuntimeError(expr.paren, f"Expected {function.arity()} arguments but got {len(arguments)}.")
-		return function.call(self, arguments)
+		try:
+			return function.call(self, arguments)
+		except NativeError as error:
+			raise RuntimeError(expr.paren, error.message)
 
 	def visitGetExpr(self, expr: Get):
 		obj = self.evaluate(expr.object)
 		if isinstance(obj, LoxInstance):
-			return obj.get(expr.name)
+			if obj.shape is not expr.cachedShape: self.cacheProperty(obj, expr)
+			if expr.cachedMethod == None:
+				return obj.values[expr.cachedIndex]
+			return expr.cachedMethod.bind(obj)
 		raise RuntimeError(expr.name, "Only instances have properties.")
 
+	def cacheProperty(self, instance, expr: Get):
+		# Inline cache on the Get node, keyed by shape. Every class has its
+		# own root shape, so a shape also fixes the class and its methods:
+		# a hit is either a field index or a method, with no lookups.
+		index = instance.shape.indexes.get(expr.name.lexeme)
+		method = None
+		if index == None:
+			method = instance.klass.findMethod(expr.name.lexeme)
+			if method == None:
+				raise RuntimeError(expr.name, f"Undefined property '{expr.name.lexeme}'.")
+		expr.cachedShape = instance.shape
+		expr.cachedIndex = index
+		expr.cachedMethod = method
+
 	def visitBlockStmt(self, stmt:Block):
-		self.executeBlock(stmt.statements, Enviroment(self.environment))
-		return None
+		return self.executeBlock(stmt.statements, LocalEnviroment(self.environment, [None] * stmt.size))
 
 	def visitIfStmt(self, stmt:If):
 		if self.isTruthy(self.evaluate(stmt.condition)):
-			self.execute(stmt.thenBranch)
+			return self.execute(stmt.thenBranch)
 		elif stmt.elseBranch != None:
-			self.execute(stmt.elseBranch)
+			return self.execute(stmt.elseBranch)
 
 		return None
 
 	def visitFunctionStmt(self, stmt: Function):
-		function = LoxFunction(stmt, self.environment)
-		self.environment.define(stmt.name.lexeme, function)
+		function = self.functionClass(stmt, self.environment)
+		self.define(stmt.slot, stmt.name, function)
 		return None
 
 	def visitClassStmt(self, stmt: Class):
-		self.environment.define(stmt.name.lexeme, None)
 		methods = {}
 		for method in stmt.methods:
-			function = LoxFunction(method, self.environment)
+			function = self.functionClass(method, self.environment)
 			methods[method.name.lexeme] = function
 		
 		klass = LoxClass(stmt.name.lexeme, methods)
 
-		self.environment.assign(stmt.name, klass)
+		self.define(stmt.slot, stmt.name, klass)
 		return None
 
 	def visitLogicalExpr(self, expr: Logical):
@@ -182,18 +320,61 @@ class Interpreter:
 		if not isinstance(obj, LoxInstance):
 			raise RuntimeError(expr.name, "Only instances have fields.")
 		value = self.evaluate(expr.value)
-		obj.set(expr.name, value) 
+		if obj.shape is not expr.cachedShape: self.cacheField(obj, expr)
+		if expr.cachedTransition == None:
+			obj.values[expr.cachedIndex] = value
+		else:
+			obj.shape = expr.cachedTransition
+			obj.values.append(value)
+		return value
+
+	def cacheField(self, instance, expr: Set):
+		# Keyed by shape like Get: either the field's index, or the shape
+		# that adding the field moves the instance to.
+		shape = instance.shape
+		index = shape.indexes.get(expr.name.lexeme)
+		expr.cachedShape = shape
+		expr.cachedIndex = index
+		expr.cachedTransition = shape.withField(expr.name.lexeme) if index == None else None
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		return LoxArray([self.evaluate(element) for element in expr.elements])
+
+	def visitIndexExpr(self, expr: Index):
+		obj = self.evaluate(expr.object)
+		if type(obj) != LoxArray and type(obj) != LoxMap:
+			raise RuntimeError(expr.bracket, "Only arrays and maps can be indexed.")
+		return obj.get(expr.bracket, self.evaluate(expr.index))
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		obj = self.evaluate(expr.object)
+		if type(obj) != LoxArray and type(obj) != LoxMap:
+			raise RuntimeError(expr.bracket, "Only arrays and maps can be indexed.")
+		index = self.evaluate(expr.index)
+		value = self.evaluate(expr.value)
+		obj.set(expr.bracket, index, value)
 		return value
 
 	def visitThisExpr(self, expr: This):
 		return self.lookupVariable(expr.keyword, expr)
 
+	def lookupVariable(self, name: Token, expr):
+		if expr.depth != None:
+			return self.environment.getAt(expr.depth, expr.slot)
+		return self.globals.get(name)
+
+	def define(self, slot, name: Token, value):
+		if slot != None:
+			self.environment.values[slot] = value
+		else:
+			self.globals.define(name.lexeme, value)
+
 	def executeBlock(self, statements, enviroment):
 		previous = self.environment
 		try:
 			self.environment = enviroment
 			for statement in statements:
-				self.execute(statement)
+				if self.execute(statement) is RETURN: return RETURN
 		finally:
 			self.environment = previous
 
@@ -201,7 +382,7 @@ class Interpreter:
 		return expr.accept(self)
 	
 	def execute(self, stmt):
-		stmt.accept(self)
+		return stmt.accept(self)
 	
 	def isTruthy(self, object):
 		if object == None : return False
@@ -217,17 +398,12 @@ class Interpreter:
 		if type(operand) == float: return
 		raise RuntimeError(operator, "Operand must be a number")
 	
+	def arithmetic(self, operator: Token, left, right):
+		if type(left) == LoxVec or type(right) == LoxVec: return elementwise(operator, left, right)
+		self.checkNumberOperands(operator, left, right)
+
 	def checkNumberOperands(self, operator: Token, left, right):
 		if type(left) == float and type(right) == float: return
 		raise RuntimeError(operator, "Operands must be numbers.")
 	
-	def stringify(self, object):
-		if object == None: return "nil"
-
-		if type(object) == float:
-			text = str(object)
-			if text.endswith(".0"):
-				text = text[0: len(text) - 2]	
-			return text
-		
-		return str(object)
\ No newline at end of file
+	stringify = staticmethod(stringify)
\ No newline at end of file
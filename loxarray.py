@@ -0,0 +1,21 @@
+class LoxArray:
+	# A growable Lox array over a Python list. Indexes are whole numbers
+	# counted from 0; anything else is a runtime error at the bracket.
+	__slots__ = ("elements",)
+
+	def __init__(self, elements):
+		self.elements = elements
+
+	def get(self, bracket, index):
+		return self.elements[self.position(bracket, index)]
+
+	def set(self, bracket, index, value):
+		self.elements[self.position(bracket, index)] = value
+
+	def position(self, bracket, index):
+		if type(index) != float or not index.is_integer():
+			raise RuntimeError(bracket, "Array index must be a whole number.")
+		position = int(index)
+		if position < 0 or position >= len(self.elements):
+			raise RuntimeError(bracket, "Array index out of range.")
+		return position
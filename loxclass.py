@@ -1,10 +1,12 @@
 from loxcallable import LoxCallable
 from loxinstance import LoxInstance
+from shape import Shape
 
 class LoxClass(LoxCallable):
 	def __init__(self, name, methods):
 		self.name = name
 		self.methods = methods
+		self.shape = Shape({})
 
 	def call(self, interpreter, arguments):
 		instance = LoxInstance(self)	
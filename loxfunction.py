@@ -1,29 +1,35 @@
 from loxcallable import LoxCallable
-from enviroment import Enviroment
-from returnexecption import ReturnException
+from completion import RETURN
+from enviroment import LocalEnviroment
 
 class LoxFunction(LoxCallable):
-	def __init__(self, declaration, closure):
+	def __init__(self, declaration, closure, receiver=None):
 		self.declaration = declaration
 		self.closure = closure	
+		self.receiver = receiver
 
 	def arity(self):
 		return len(self.declaration.params)
 
 	def call(self, interpreter, arguments):
-		environment = Enviroment(self.closure)
-		for i in range(0, len(self.declaration.params)):
-			environment.define(self.declaration.params[i].lexeme, arguments[i])
-		try:	
-			interpreter.executeBlock(self.declaration.body, environment)
-		except ReturnException as returnValue:
-			return returnValue.value
+		# The argument list is freshly built by the caller; it becomes the
+		# call's slot array, padded for the body's own locals.
+		if self.receiver != None: arguments.insert(0, self.receiver)
+		locals = self.declaration.size - len(arguments)
+		if locals: arguments += [None] * locals
+		environment = LocalEnviroment(self.closure, arguments)
+		if interpreter.executeBlock(self.declaration.body, environment) is RETURN:
+			return interpreter.returnValue
 		return None
 
+	def callMethod(self, interpreter, receiver, arguments):
+		# Calls an unbound method directly: 'this' lives in slot 0 of the
+		# method's own environment.
+		arguments.insert(0, receiver)
+		return self.call(interpreter, arguments)
+
 	def bind(self, instance):
-		environment = Enviroment(self.closure)
-		environment.define("this", instance)
-		return LoxFunction(self.declaration, environment)
+		return LoxFunction(self.declaration, self.closure, instance)
 
 	def __str__(self):
 		return f"<fn {self.declaration.name.lexeme}>"
\ No newline at end of file
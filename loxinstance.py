@@ -1,18 +1,27 @@
 class LoxInstance:
+	__slots__ = ("klass", "shape", "values")
+
 	def __init__(self, klass):
 		self.klass = klass
-		self.fields = {}	
+		self.shape = klass.shape
+		self.values = []
 
 	def get(self, name):
-		if name.lexeme in self.fields:
-			return self.fields.get(name.lexeme)
+		index = self.shape.indexes.get(name.lexeme)
+		if index != None:
+			return self.values[index]
 		
 		method = self.klass.findMethod(name.lexeme)
 		if method != None: return method.bind(self)
 		raise RuntimeError(name, f"Undefined property '{name.lexeme}'.")
 
 	def set(self, name, value):
-		self.fields.put(name.lexeme, value)
+		index = self.shape.indexes.get(name.lexeme)
+		if index != None:
+			self.values[index] = value
+		else:
+			self.shape = self.shape.withField(name.lexeme)
+			self.values.append(value)
 
 	def __str__(self):
-		return f"{self.klass.name} instance"
\ No newline at end of file
+		return f"{self.klass.name} instance"
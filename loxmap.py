@@ -0,0 +1,22 @@
+class LoxMap:
+	# A Lox map over a Python dict. Keys are strings, numbers, booleans and
+	# nil. Python's == and hash take true for 1 and false for 0, so entries
+	# are stored under (type, key) to keep them apart. Reading a missing key
+	# gives nil.
+	__slots__ = ("entries",)
+
+	keyTypes = (str, float, bool, type(None))
+
+	def __init__(self, entries):
+		self.entries = entries
+
+	def get(self, bracket, key):
+		if type(key) not in LoxMap.keyTypes: self.badKey(bracket)
+		return self.entries.get((type(key), key))
+
+	def set(self, bracket, key, value):
+		if type(key) not in LoxMap.keyTypes: self.badKey(bracket)
+		self.entries[(type(key), key)] = value
+
+	def badKey(self, bracket):
+		raise RuntimeError(bracket, "Map keys must be strings, numbers, booleans or nil.")
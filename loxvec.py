@@ -0,0 +1,25 @@
+class LoxVec:
+	# A vector of float64 over a NumPy array. NumPy is never imported here:
+	# vectors are only made by the vec natives, which globals.py registers
+	# when NumPy is installed and which import it on first use.
+	__slots__ = ("values",)
+
+	def __init__(self, values):
+		self.values = values
+
+def elementwise(operator, left, right):
+	# The engines call this for + - * / when an operand is a vector. The
+	# other may be a vector of the same length or a number. Goes by the
+	# operator's lexeme, the one part of it every engine keeps.
+	a = left.values if type(left) == LoxVec else left
+	b = right.values if type(right) == LoxVec else right
+	if (type(left) != LoxVec and type(left) != float) or (type(right) != LoxVec and type(right) != float):
+		raise RuntimeError(operator, "Operands must be numbers or vectors.")
+	if type(left) == LoxVec and type(right) == LoxVec and len(a) != len(b):
+		raise RuntimeError(operator, "Vectors must have the same length.")
+	if operator.lexeme == "+": return LoxVec(a + b)
+	if operator.lexeme == "-": return LoxVec(a - b)
+	if operator.lexeme == "*": return LoxVec(a * b)
+	import numpy
+	with numpy.errstate(divide="ignore", invalid="ignore"):
+		return LoxVec(a / b)
@@ -0,0 +1,187 @@
+from expr import ArrayLiteral, Assign, Binary, Call, Get, Grouping, Index, Literal, Logical, Set, SetIndex, This, Unary, Variable
+from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
+from token_type import *
+
+class Optimizer:
+	# Runs between parsing and resolving, so it is free to reshape scopes:
+	# folds constant subtrees, strips groupings, removes branches and loops
+	# with literal conditions and splices away blocks that declare nothing.
+	def optimize(self, statements):
+		return self.statements(statements)
+
+	def statements(self, statements):
+		out = []
+		for statement in statements:
+			statement = self.optimizeStmt(statement)
+			if statement == None: continue
+			if type(statement) == Block and not self.declares(statement.statements):
+				out.extend(statement.statements)
+			else:
+				out.append(statement)
+		return out
+
+	def declares(self, statements):
+		for statement in statements:
+			if type(statement) in (Var, Function, Class): return True
+		return False
+
+	def body(self, stmt):
+		# A statement in a position that needs exactly one: while bodies and
+		# if branches.
+		stmt = self.optimizeStmt(stmt)
+		if stmt == None: return Block([])
+		if type(stmt) == Block and len(stmt.statements) == 1 and not self.declares(stmt.statements):
+			return stmt.statements[0]
+		return stmt
+
+	def optimizeStmt(self, stmt):
+		return stmt.accept(self)
+
+	def optimizeExpr(self, expr):
+		return expr.accept(self)
+
+	def isTruthy(self, value):
+		if value == None: return False
+		if type(value) == bool: return value
+		return True
+
+	def visitBlockStmt(self, stmt: Block):
+		stmt.statements = self.statements(stmt.statements)
+		if len(stmt.statements) == 0: return None
+		return stmt
+
+	def visitClassStmt(self, stmt: Class):
+		for method in stmt.methods:
+			method.body = self.statements(method.body)
+		return stmt
+
+	def visitExpressionStmt(self, stmt: Expression):
+		stmt.expression = self.optimizeExpr(stmt.expression)
+		if type(stmt.expression) == Literal: return None
+		return stmt
+
+	def visitFunctionStmt(self, stmt: Function):
+		stmt.body = self.statements(stmt.body)
+		return stmt
+
+	def visitIfStmt(self, stmt: If):
+		stmt.condition = self.optimizeExpr(stmt.condition)
+		if type(stmt.condition) == Literal:
+			if self.isTruthy(stmt.condition.value):
+				return self.optimizeStmt(stmt.thenBranch)
+			if stmt.elseBranch != None:
+				return self.optimizeStmt(stmt.elseBranch)
+			return None
+		stmt.thenBranch = self.body(stmt.thenBranch)
+		if stmt.elseBranch != None:
+			stmt.elseBranch = self.body(stmt.elseBranch)
+			if type(stmt.elseBranch) == Block and len(stmt.elseBranch.statements) == 0:
+				stmt.elseBranch = None
+		return stmt
+
+	def visitPrintStmt(self, stmt: Print):
+		stmt.expression = self.optimizeExpr(stmt.expression)
+		return stmt
+
+	def visitReturnStmt(self, stmt: Return):
+		if stmt.value != None: stmt.value = self.optimizeExpr(stmt.value)
+		return stmt
+
+	def visitVarStmt(self, stmt: Var):
+		if stmt.initializer != None: stmt.initializer = self.optimizeExpr(stmt.initializer)
+		return stmt
+
+	def visitWhileStmt(self, stmt: While):
+		stmt.condition = self.optimizeExpr(stmt.condition)
+		if type(stmt.condition) == Literal and not self.isTruthy(stmt.condition.value):
+			return None
+		stmt.body = self.body(stmt.body)
+		return stmt
+
+	def visitAssignExpr(self, expr: Assign):
+		expr.value = self.optimizeExpr(expr.value)
+		return expr
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		expr.elements = [self.optimizeExpr(element) for element in expr.elements]
+		return expr
+
+	def visitBinaryExpr(self, expr: Binary):
+		expr.left = self.optimizeExpr(expr.left)
+		expr.right = self.optimizeExpr(expr.right)
+		if type(expr.left) != Literal or type(expr.right) != Literal: return expr
+
+		left = expr.left.value
+		right = expr.right.value
+		operator = expr.operator.token_type
+		if operator == EQUAL_EQUAL: return Literal(left == right)
+		if operator == BANG_EQUAL: return Literal(left != right)
+		if operator == PLUS and type(left) == str and type(right) == str:
+			return Literal(left + right)
+		# Anything else that is not float/float is a runtime error: keep it.
+		if type(left) != float or type(right) != float: return expr
+		if operator == PLUS: return Literal(left + right)
+		if operator == MINUS: return Literal(left - right)
+		if operator == STAR: return Literal(left * right)
+		if operator == SLASH and right != 0: return Literal(left / right)
+		if operator == GREATER: return Literal(left > right)
+		if operator == GREATER_EQUAL: return Literal(left >= right)
+		if operator == LESS: return Literal(left < right)
+		if operator == LESS_EQUAL: return Literal(left <= right)
+		return expr
+
+	def visitCallExpr(self, expr: Call):
+		expr.callee = self.optimizeExpr(expr.callee)
+		expr.arguments = [self.optimizeExpr(argument) for argument in expr.arguments]
+		return expr
+
+	def visitGetExpr(self, expr: Get):
+		expr.object = self.optimizeExpr(expr.object)
+		return expr
+
+	def visitGroupingExpr(self, expr: Grouping):
+		return self.optimizeExpr(expr.expression)
+
+	def visitIndexExpr(self, expr: Index):
+		expr.object = self.optimizeExpr(expr.object)
+		expr.index = self.optimizeExpr(expr.index)
+		return expr
+
+	def visitLiteralExpr(self, expr: Literal):
+		return expr
+
+	def visitLogicalExpr(self, expr: Logical):
+		expr.left = self.optimizeExpr(expr.left)
+		expr.right = self.optimizeExpr(expr.right)
+		if type(expr.left) != Literal: return expr
+		truthy = self.isTruthy(expr.left.value)
+		if expr.operator.token_type == OR:
+			return expr.left if truthy else expr.right
+		return expr.right if truthy else expr.left
+
+	def visitSetExpr(self, expr: Set):
+		expr.object = self.optimizeExpr(expr.object)
+		expr.value = self.optimizeExpr(expr.value)
+		return expr
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		expr.object = self.optimizeExpr(expr.object)
+		expr.index = self.optimizeExpr(expr.index)
+		expr.value = self.optimizeExpr(expr.value)
+		return expr
+
+	def visitThisExpr(self, expr: This):
+		return expr
+
+	def visitUnaryExpr(self, expr: Unary):
+		expr.right = self.optimizeExpr(expr.right)
+		if type(expr.right) != Literal: return expr
+		value = expr.right.value
+		if expr.operator.token_type == BANG:
+			return Literal(not self.isTruthy(value))
+		if type(value) == float:
+			return Literal(-value)
+		return expr
+
+	def visitVariableExpr(self, expr: Variable):
+		return expr
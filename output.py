@@ -0,0 +1,25 @@
+import sys
+
+class Output:
+	# What Lox prints, collected and written to stdout in large chunks
+	# instead of one write per print statement. Plox flushes it when a run
+	# ends, before it reports an error and before each REPL prompt, so
+	# output still lines up with error messages. A limit of 0 writes every
+	# line as it comes.
+	def __init__(self, limit=1 << 16):
+		self.lines = []
+		self.size = 0
+		self.limit = limit
+
+	def writeLine(self, text):
+		self.lines.append(text)
+		self.size += len(text) + 1
+		if self.size >= self.limit: self.flush()
+
+	def flush(self):
+		if len(self.lines) > 0:
+			self.lines.append("")
+			sys.stdout.write("\n".join(self.lines))
+			self.lines = []
+			self.size = 0
+		sys.stdout.flush()
@@ -1,9 +1,8 @@
 import constantly
-from loxinstance import LoxInstance
 from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
 from tokens import Token
 from token_type import *
-from expr import Assign, Binary, Call, Get, Logical, Set, This, Unary, Literal, Grouping, Variable 
+from expr import ArrayLiteral, Assign, Binary, Call, Get, Index, Logical, Set, SetIndex, This, Unary, Literal, Grouping, Variable 
 from plox import Plox
 
 class ParserError(Exception):
@@ -33,16 +32,16 @@ class Parser:
 
 	def classDeclaration(self):
 		name = self.consume(IDENTIFIER, "Expect class name.")
-		self.consume(LEFT_BRACE, "Expect '{' before class body.")
+		self.skip(LEFT_BRACE, "Expect '{' before class body.")
 		methods = []
 		while not self.check(RIGHT_BRACE) and not self.isAtEnd() :
 			methods.append(self.function("method"))
-		self.consume(RIGHT_BRACE, "Expect '}' after class body.")
+		self.skip(RIGHT_BRACE, "Expect '}' after class body.")
 		return Class(name, methods)
 
 	def function(self, kind):
 		name = self.consume(IDENTIFIER, f"Expect {kind} name.")
-		self.consume(LEFT_PAREN, f"Expect '(' after {kind} name.")
+		self.skip(LEFT_PAREN, f"Expect '(' after {kind} name.")
 		parameters = []
 		if not self.check(RIGHT_PAREN):
 			parameters.append(self.consume(IDENTIFIER, "Expect parameter name."))
@@ -50,8 +49,8 @@ class Parser:
 				if len(parameters) >= 255:
 					self.parser_error(self.peek(), "Can't have more than 255 parameters.")	
 				parameters.append(self.consume(IDENTIFIER, "Expect parameter name."))
-		self.consume(RIGHT_PAREN, "Expect ')' after parameters.")
-		self.consume(LEFT_BRACE, "Expect '{' before "+kind+" body.")
+		self.skip(RIGHT_PAREN, "Expect ')' after parameters.")
+		self.skip(LEFT_BRACE, "Expect '{' before "+kind+" body.")
 		body = self.block()
 		return Function(name, parameters, body)
 
@@ -60,7 +59,7 @@ class Parser:
 		initializer = None
 		if self.match(EQUAL):
 			initializer = self.expression()
-		self.consume(SEMICOLON, "Expect ';' after variable declaration.")
+		self.skip(SEMICOLON, "Expect ';' after variable declaration.")
 		return Var(name, initializer)
 
 	def statement(self):
@@ -73,7 +72,7 @@ class Parser:
 		return self.expressionStatement()
 
 	def forStatement(self):
-		self.consume(LEFT_PAREN, "Expect '(' after 'for'.")
+		self.skip(LEFT_PAREN, "Expect '(' after 'for'.")
 		initializer = None
 		if self.match(SEMICOLON):
 			initializer = None
@@ -84,11 +83,11 @@ class Parser:
 		condition = None
 		if not self.check(SEMICOLON):
 			condition = self.expression()
-		self.consume(SEMICOLON, "Expect ';' after loop condition.")
+		self.skip(SEMICOLON, "Expect ';' after loop condition.")
 		increment = None
 		if not self.check(RIGHT_PAREN):
 			increment = self.expression()
-		self.consume(RIGHT_PAREN, "Expect ')' after for clauses.")
+		self.skip(RIGHT_PAREN, "Expect ')' after for clauses.")
 		body = self.statement()
 
 		if increment != None:
@@ -103,16 +102,16 @@ class Parser:
 		return body
 
 	def whileStatement(self):
-		self.consume(LEFT_PAREN, "Expect '(' after 'while'.")
+		self.skip(LEFT_PAREN, "Expect '(' after 'while'.")
 		condition = self.expression()
-		self.consume(RIGHT_PAREN, "Expect ')' after condition.")
+		self.skip(RIGHT_PAREN, "Expect ')' after condition.")
 		body = self.statement()
 		return While(condition, body)
 
 	def ifStatement(self):
-		self.consume(LEFT_PAREN, "Expect '(' after 'if'.")
+		self.skip(LEFT_PAREN, "Expect '(' after 'if'.")
 		condition = self.expression()
-		self.consume(RIGHT_PAREN, "Expect ')' after if condition.")
+		self.skip(RIGHT_PAREN, "Expect ')' after if condition.")
 		thenBranch = self.statement()
 		elseBranch = None
 		if self.match(ELSE):
@@ -121,7 +120,7 @@ class Parser:
 
 	def printStatement(self):
 		value = self.expression()
-		self.consume(SEMICOLON, "Expect ';' after value.")
+		self.skip(SEMICOLON, "Expect ';' after value.")
 		return Print(value)
 
 	def returnStatement(self):
@@ -129,19 +128,19 @@ class Parser:
 		value = None
 		if not self.check(SEMICOLON):
 			value = self.expression()
-		self.consume(SEMICOLON, "Expect ';' after return value.")
+		self.skip(SEMICOLON, "Expect ';' after return value.")
 		return Return(keyword, value)
 
 	def expressionStatement(self):
 		expr = self.expression()
-		self.consume(SEMICOLON, "Expect ';' after expression.")
+		self.skip(SEMICOLON, "Expect ';' after expression.")
 		return Expression(expr)
 
 	def block(self):
 		statements = []
 		while (not self.check(RIGHT_BRACE) and not self.isAtEnd()):
 			statements.append(self.declaration())
-		self.consume(RIGHT_BRACE, "Expect '}' after block.")
+		self.skip(RIGHT_BRACE, "Expect '}' after block.")
 		return statements
 
 	def expression(self):
@@ -155,9 +154,11 @@ class Parser:
 			if type(expr) == Variable:
 				name = expr.name
 				return Assign(name, value)
-			elif isinstance(expr, LoxInstance):
+			elif type(expr) == Get:
 				get = expr
 				return Set(get.object, get.name, value)
+			elif type(expr) == Index:
+				return SetIndex(expr.object, expr.bracket, expr.index, value)
 
 			self.error(equals, "Invalid assignment target.")
 
@@ -184,7 +185,7 @@ class Parser:
 
 		while (self.match(BANG_EQUAL, EQUAL_EQUAL)):
 			operator = self.previous()
-			right = self.comparsion()
+			right = self.comparison()
 			expr = Binary(expr, operator, right)
 
 		return expr
@@ -229,6 +230,10 @@ class Parser:
 			elif self.match(DOT):
 				name = self.consume(IDENTIFIER, "Expect property name after '.'.")
 				expr = Get(expr, name)
+			elif self.match(LEFT_BRACKET):
+				index = self.expression()
+				bracket = self.consume(RIGHT_BRACKET, "Expect ']' after index.")
+				expr = Index(expr, bracket, index)
 			else:
 				break
 		return expr 
@@ -256,8 +261,17 @@ class Parser:
 			return This(self.previous())
 		if (self.match(LEFT_PAREN)):
 			expr = self.expression()
-			self.consume(RIGHT_PAREN, "Expect ')' after expression")
+			self.skip(RIGHT_PAREN, "Expect ')' after expression")
 			return Grouping(expr)
+		if self.match(LEFT_BRACKET):
+			elements = []
+			if not self.check(RIGHT_BRACKET):
+				elements.append(self.expression())
+				while self.match(COMMA):
+					elements.append(self.expression())
+			bracket = self.consume(RIGHT_BRACKET, "Expect ']' after array elements.")
+			return ArrayLiteral(bracket, elements)
+		raise self.error(self.peek(), "Expect expression.")
 
 	def match(self, *token_types):
 		for token_type in token_types:
@@ -284,6 +298,9 @@ class Parser:
 	def consume(self, token_type, message):
 		if(self.check(token_type)): return self.advance()
 		raise self.error(self.peek(), message)
+
+	# consume() for punctuation the grammar checks for and then drops.
+	skip = consume
 	
 	def error(self, token_type, message):
 		self.parser_error(token_type, message)
@@ -300,4 +317,68 @@ class Parser:
 			if self.peek().token_type == CLASS | FUN | VAR | FOR:
 				return
 
-			self.advance()
\ No newline at end of file
+			self.advance()
+
+class StreamingParser(Parser):
+	# Pulls tokens from an iterator as it goes instead of indexing a list.
+	# The grammar never looks further than one token back and one ahead, so
+	# those two are all that is kept.
+	def __init__(self, tokens, parser_error):
+		super().__init__(None, parser_error)
+		self.stream = iter(tokens)
+		self.last = None
+		self.next = next(self.stream)
+
+	def advance(self):
+		if self.next.token_type != EOF:
+			self.last = self.next
+			self.next = next(self.stream)
+		return self.last
+
+	def isAtEnd(self):
+		return self.next.token_type == EOF
+
+	def previous(self):
+		return self.last
+
+	def peek(self):
+		return self.next
+
+
+class ColumnarParser(Parser):
+	# Reads a TokenStore: type checks go straight to the int column and a
+	# Token is only materialized when the grammar keeps or reports one.
+	def __init__(self, store, parser_error):
+		super().__init__(store, parser_error)
+		self.types = store.types
+
+	def match(self, *token_types):
+		# Skips a matched token without building it; callers that want it
+		# ask previous().
+		current = self.types[self.current]
+		if current in token_types and current != EOF:
+			self.current += 1
+			return True
+		return False
+
+	def check(self, token_type):
+		current = self.types[self.current]
+		return current == token_type and current != EOF
+
+	def advance(self):
+		if self.types[self.current] != EOF: self.current += 1
+		return self.previous()
+
+	def skip(self, token_type, message):
+		# Moves past ; ) { } and the like without building their Tokens.
+		if not self.check(token_type): raise self.error(self.peek(), message)
+		self.current += 1
+
+	def isAtEnd(self):
+		return self.types[self.current] == EOF
+
+	def previous(self):
+		return self.tokens.token(self.current - 1)
+
+	def peek(self):
+		return self.tokens.token(self.current)
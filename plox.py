@@ -4,12 +4,27 @@ from tokens import Token
 from token_type import *
 from expr import Expr 
 
+ENGINES = ("tree", "vm", "closure", "py")
+
 class Plox:
-	def __init__(self):
+	def __init__(self, engine="tree"):
 		self.hadError = False
 		self.hadRuntimeError = False
+		self.engine = engine
+		self.optimize = True
+		self.dumpAst = False
+		self.stream = False
+		self.columnar = False
+		self.cache = True
+		self.profile = False
+		self.profileLines = False
+		self.profileJson = None
+		self.sample = None
+		self.unbuffered = False
 		from interpreter import Interpreter
 		self.interpreter = Interpreter()
+		self.vm = None
+		self.pyPrograms = {}
 
 	def report(self, line, where, message):
 		self.hadError = True
@@ -25,25 +40,122 @@ class Plox:
 			self.report(token.line, f" at {token.lexeme}", message)
 
 	def runtimeError(self, error: RuntimeError):
-		print(f"{error.args[1]} \n[line {error.args[0].line}]")
 		self.hadRuntimeError = True
+		# Whatever the program printed before failing goes out first.
+		self.interpreter.output.flush()
+		if isinstance(error, RecursionError):
+			# The other engines nest Python calls for Lox calls. The VM keeps
+			# Lox frames in a list, but still recurses in Python when natives
+			# call back into Lox or stringify walks nested values.
+			if self.engine == "vm":
+				print("Stack overflow.")
+			else:
+				print("Stack overflow. Run with --engine=vm for deep recursion.")
+			return
+		if type(error) != RuntimeError or len(error.args) != 2 or type(error.args[0]) != Token:
+			# Some other Python RuntimeError, such as a NotImplementedError or
+			# one from a native: there is no token to take a line from.
+			print(f"Runtime error: {error}")
+			return
+		print(f"{error.args[1]} \n[line {error.args[0].line}]")
+
+	def run(self, source, path=None):
+		# Print output is buffered for the length of a run, which in the
+		# REPL is a line: it is all out before the next prompt.
+		try:
+			self.run_source(source, path)
+		finally:
+			self.interpreter.output.flush()
 
-	def run(self, source):
-		from scanner import Scanner
-		from parser import Parser
-		scanner = Scanner(source, self.error)
-		tokens = scanner.scanTokens()
-		parser = Parser(tokens, self.parser_error)
+	def run_source(self, source, path):
+		if self.engine == "py" and source in self.pyPrograms:
+			self.pyPrograms[source].run(self.interpreter, self)
+			return
+		cache = None
+		statements = None
+		if path != None and self.cache and not self.dumpAst:
+			from programcache import ProgramCache
+			cache = ProgramCache(path, self.optimize)
+			if self.engine == "py":
+				program = cache.loadProgram(source)
+				if program != None:
+					self.pyPrograms[source] = program
+					program.run(self.interpreter, self)
+					return
+			statements = cache.load(source)
+		if statements == None:
+			statements = self.compile(source)
+			if statements == None: return
+			if cache != None: cache.store(source, statements)
+		if self.engine == "vm":
+			self.run_vm(statements)
+		elif self.engine == "py":
+			from transpiler import Transpiler
+			program = Transpiler().transpile(statements)
+			self.pyPrograms[source] = program
+			if cache != None: cache.storeProgram(source, program)
+			program.run(self.interpreter, self)
+		elif self.engine == "closure":
+			from closurecompiler import ClosureCompiler
+			ClosureCompiler(self.interpreter).interpret(statements, self)
+		else:
+			self.interpreter.interpret(statements, self)
+
+	def compile(self, source):
+		# Scans, parses, optimizes and resolves; None if there were errors.
+		from regexscanner import RegexScanner
+		from parser import ColumnarParser, Parser, StreamingParser
+		from resolver import Resolver
+		scanner = RegexScanner(source, self.error)
+		if self.stream:
+			parser = StreamingParser(scanner.scanTokensLazily(), self.parser_error)
+		elif self.columnar:
+			parser = ColumnarParser(scanner.scanTokenStore(), self.parser_error)
+		else:
+			parser = Parser(scanner.scanTokens(), self.parser_error)
 		statements = parser.parse()
-		if self.hadError: return 
-		self.interpreter.interpret(statements, self)
+		if self.hadError: return None
+		if self.dumpAst:
+			print("== parsed ==")
+			print(AstPrinter().printProgram(statements))
+		if self.optimize:
+			from optimizer import Optimizer
+			statements = Optimizer().optimize(statements)
+			if self.dumpAst:
+				print("== optimized ==")
+				print(AstPrinter().printProgram(statements))
+		resolver = Resolver(self.parser_error)
+		resolver.resolve(statements)
+		if self.hadError: return None
+		return statements
+
+	def run_vm(self, statements):
+		from compiler import Compiler
+		from vm import VM
+		if self.vm == None:
+			self.vm = VM(self.interpreter)
+		function = Compiler().compile(statements)
+		self.vm.interpret(function, self)
 
 	def run_file(self, path):
 		source_text = ""
 		with open(path, 'r') as source_file:
 			source_text = source_file.read()
 
-		self.run(source_text)
+		sampler = None
+		if self.sample != None:
+			from profiler import Sampler
+			sampler = Sampler(self.interpreter)
+			sampler.start()
+		self.run(source_text, path)
+		if sampler != None:
+			sampler.stop()
+			sampler.write(self.sample)
+		if self.profile:
+			if self.profileJson != None:
+				self.interpreter.writeJson(self.profileJson)
+			else:
+				self.interpreter.report()
 		if self.hadError:
 			exit()
 		if self.hadRuntimeError:
@@ -59,10 +171,51 @@ class Plox:
 			self.hadError = False
 
 	def main(self,args):
-		if len(args) > 1:
-			print("Usage: plox.py [script]")
+		options = [arg for arg in args if arg.startswith("--")]
+		args = [arg for arg in args if not arg.startswith("--")]
+		for option in options:
+			if option.startswith("--engine=") and option[len("--engine="):] in ENGINES:
+				self.engine = option[len("--engine="):]
+			elif option == "--no-optimize":
+				self.optimize = False
+			elif option == "--dump-ast":
+				self.dumpAst = True
+			elif option == "--stream":
+				self.stream = True
+			elif option == "--columnar":
+				self.columnar = True
+			elif option == "--no-cache":
+				self.cache = False
+			elif option == "--profile":
+				self.profile = True
+			elif option == "--profile-lines":
+				self.profile = self.profileLines = True
+			elif option.startswith("--profile-json="):
+				self.profile = True
+				self.profileJson = option[len("--profile-json="):]
+			elif option.startswith("--sample="):
+				self.sample = option[len("--sample="):]
+			elif option == "--unbuffered":
+				self.unbuffered = True
+			else:
+				args = None
+		if (self.profile or self.sample != None) and self.engine != "tree":
+			args = None
+		if self.profile and self.sample != None:
+			args = None
+		if args == None or len(args) > 1:
+			print(f"Usage: plox.py [--engine={'|'.join(ENGINES)}] [--no-optimize] [--dump-ast] [--stream] [--columnar] [--no-cache] [--profile] [--profile-lines] [--profile-json=path] [--sample=path] [--unbuffered] [script]")
 			exit()
-		elif (len(args) == 1):
+		# Both profilers watch the tree-walking engine only.
+		if self.profile:
+			from profiler import ProfilingInterpreter
+			self.interpreter = ProfilingInterpreter(self.profileLines)
+		if self.sample != None:
+			from profiler import SamplingInterpreter
+			self.interpreter = SamplingInterpreter()
+		if self.unbuffered:
+			self.interpreter.output.limit = 0
+		if (len(args) == 1):
 			self.run_file(args[0])
 		else:
 			self.run_prompt()
@@ -0,0 +1,199 @@
+import json
+import threading
+import time
+from expr import ArrayLiteral, Assign, Binary, Call, Get, Grouping, Index, Logical, Set, SetIndex, This, Unary, Variable
+from interpreter import Interpreter
+from loxfunction import LoxFunction
+from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
+
+class Timing:
+	__slots__ = ("name", "line", "calls", "selfTime", "totalTime", "active")
+
+	def __init__(self, name, line):
+		self.name = name
+		self.line = line
+		self.calls = 0
+		self.selfTime = 0.0
+		self.totalTime = 0.0
+		self.active = 0
+
+class Timings:
+	# Entries keyed by declaration or line, plus the stack of running ones.
+	# Self time leaves out time spent in entries started meanwhile; total
+	# time is only added by the outermost activation, so recursion is not
+	# counted twice.
+	def __init__(self):
+		self.entries = {}
+		self.stack = []
+
+	def start(self, key, name, line):
+		timing = self.entries.get(key)
+		if timing == None:
+			timing = self.entries[key] = Timing(name, line)
+		timing.calls += 1
+		timing.active += 1
+		self.stack.append([timing, 0.0, time.perf_counter()])
+
+	def stop(self):
+		timing, childTime, started = self.stack.pop()
+		elapsed = time.perf_counter() - started
+		timing.selfTime += elapsed - childTime
+		timing.active -= 1
+		if timing.active == 0: timing.totalTime += elapsed
+		if self.stack: self.stack[-1][1] += elapsed
+
+	def sorted(self):
+		return sorted(self.entries.values(), key=lambda timing: timing.selfTime, reverse=True)
+
+class ProfiledFunction(LoxFunction):
+	def call(self, interpreter, arguments):
+		name = self.declaration.name
+		interpreter.functionTimings.start(self.declaration, name.lexeme, name.line)
+		try:
+			return super().call(interpreter, arguments)
+		finally:
+			interpreter.functionTimings.stop()
+
+	def bind(self, instance):
+		return ProfiledFunction(self.declaration, self.closure, instance)
+
+class ProfilingInterpreter(Interpreter):
+	# The tree-walking interpreter, timing every Lox function call and, with
+	# lines on, every statement. Its functions are ProfiledFunctions, which
+	# call sites never quicken, so all calls go through ProfiledFunction.call.
+	functionClass = ProfiledFunction
+
+	def __init__(self, lines=False):
+		super().__init__()
+		self.functionTimings = Timings()
+		self.lineTimings = Timings() if lines else None
+		self.statementLines = {}
+
+	def execute(self, stmt):
+		if self.lineTimings == None: return stmt.accept(self)
+		line = self.statementLines.get(stmt)
+		if line == None:
+			line = self.statementLines[stmt] = lineOf(stmt)
+		if line == -1: return stmt.accept(self)
+		self.lineTimings.start(line, None, line)
+		try:
+			return stmt.accept(self)
+		finally:
+			self.lineTimings.stop()
+
+	def report(self):
+		print()
+		print(f"{'calls':>9} {'self s':>9} {'total s':>9}  function")
+		for timing in self.functionTimings.sorted():
+			print(f"{timing.calls:>9} {timing.selfTime:>9.4f} {timing.totalTime:>9.4f}  {timing.name} (line {timing.line})")
+		if self.lineTimings == None: return
+		print()
+		print(f"{'hits':>9} {'self s':>9} {'total s':>9}  line")
+		for timing in self.lineTimings.sorted():
+			print(f"{timing.calls:>9} {timing.selfTime:>9.4f} {timing.totalTime:>9.4f}  {timing.line}")
+
+	def writeJson(self, path):
+		report = {"functions": [{"name": timing.name, "line": timing.line, "calls": timing.calls,
+			"self": timing.selfTime, "total": timing.totalTime} for timing in self.functionTimings.sorted()]}
+		if self.lineTimings != None:
+			report["lines"] = [{"line": timing.line, "hits": timing.calls, "self": timing.selfTime,
+				"total": timing.totalTime} for timing in self.lineTimings.sorted()]
+		with open(path, "w") as report_file:
+			json.dump(report, report_file, indent=2)
+
+class SampledFunction(LoxFunction):
+	def call(self, interpreter, arguments):
+		callStack = interpreter.callStack
+		callStack.append((self.declaration, interpreter.statement))
+		try:
+			return super().call(interpreter, arguments)
+		finally:
+			callStack.pop()
+
+	def bind(self, instance):
+		return SampledFunction(self.declaration, self.closure, instance)
+
+class SamplingInterpreter(Interpreter):
+	# The tree-walking interpreter keeping a shadow stack for a Sampler: the
+	# running Lox calls, each with the statement that made it, and the
+	# statement running now. Nothing is timed here.
+	functionClass = SampledFunction
+
+	def __init__(self):
+		super().__init__()
+		self.callStack = []
+		self.statement = None
+
+	def execute(self, stmt):
+		previous = self.statement
+		self.statement = stmt
+		try:
+			return stmt.accept(self)
+		finally:
+			self.statement = previous
+
+class Sampler:
+	# Background thread reading a SamplingInterpreter's shadow stack every
+	# interval and counting identical stacks, written out in the collapsed
+	# format flamegraph tools read: "<script>:12;outer:3;inner:7 42". The
+	# main thread holds the GIL while it runs Lox, so samples land at most
+	# once per sys.getswitchinterval().
+	def __init__(self, interpreter, interval=0.001):
+		self.interpreter = interpreter
+		self.interval = interval
+		self.counts = {}
+		self.statementLines = {}
+		self.stopped = threading.Event()
+		self.thread = threading.Thread(target=self.run, daemon=True)
+
+	def start(self):
+		self.thread.start()
+
+	def stop(self):
+		self.stopped.set()
+		self.thread.join()
+
+	def run(self):
+		while not self.stopped.wait(self.interval):
+			self.sample()
+
+	def sample(self):
+		statement = self.interpreter.statement
+		calls = list(self.interpreter.callStack)
+		if statement == None: return
+		frames = []
+		name = "<script>"
+		for declaration, callSite in calls:
+			frames.append(f"{name}:{self.lineOf(callSite)}")
+			name = declaration.name.lexeme
+		frames.append(f"{name}:{self.lineOf(statement)}")
+		stack = ";".join(frames)
+		self.counts[stack] = self.counts.get(stack, 0) + 1
+
+	def lineOf(self, stmt):
+		line = self.statementLines.get(stmt)
+		if line == None:
+			line = self.statementLines[stmt] = lineOf(stmt)
+		return line
+
+	def write(self, path):
+		with open(path, "w") as stacks_file:
+			for stack, count in sorted(self.counts.items()):
+				stacks_file.write(f"{stack} {count}\n")
+
+
+def lineOf(node):
+	# Statements carry no line; use a token from inside them. -1 where there
+	# is none, as in a statement made of a literal.
+	if type(node) in (Var, Function, Class): return node.name.line
+	if type(node) == Return: return node.keyword.line
+	if type(node) == Block: return lineOf(node.statements[0]) if node.statements else -1
+	if type(node) in (Expression, Print): return lineOf(node.expression)
+	if type(node) in (If, While): return lineOf(node.condition)
+	if type(node) in (Assign, Variable, Get, Set): return node.name.line
+	if type(node) == This: return node.keyword.line
+	if type(node) in (ArrayLiteral, Index, SetIndex): return node.bracket.line
+	if isinstance(node, (Binary, Logical, Unary)): return node.operator.line
+	if isinstance(node, Call): return node.paren.line
+	if type(node) == Grouping: return lineOf(node.expression)
+	return -1
@@ -0,0 +1,126 @@
+import gc
+import hashlib
+import marshal
+import os
+import sys
+import tempfile
+import expr
+import stmt
+from tokens import Token
+
+# Bump when the parser, optimizer, resolver or transpiler change what they
+# produce for the same source; changes to the node classes themselves are
+# picked up from their __slots__.
+VERSION = 3
+
+CACHE_DIR = "__loxcache__"
+
+nodeClasses = [cls for module in (expr, stmt) for cls in vars(module).values()
+	if isinstance(cls, type) and cls.__module__ == module.__name__ and cls.__slots__]
+nodeCodes = {cls: code for code, cls in enumerate(nodeClasses)}
+TOKEN = -1
+
+schema = repr([(cls.__name__, cls.__slots__) for cls in nodeClasses])
+
+class ProgramCache:
+	# Keeps the optimized and resolved AST of a script in
+	# __loxcache__/<script>.loxc next to it, much like __pycache__. Nodes
+	# become tuples (class code, fields...) and tokens (TOKEN, type, lexeme,
+	# literal, line), which marshal writes and reads in C. The py engine
+	# also keeps its transpiled program in <script>.loxpy. Caching is best
+	# effort: any problem reading or writing just means compiling again.
+	def __init__(self, path, optimize):
+		directory, name = os.path.split(os.path.abspath(path))
+		self.directory = os.path.join(directory, CACHE_DIR)
+		self.path = os.path.join(self.directory, name + ".loxc")
+		self.pyPath = os.path.join(self.directory, name + ".loxpy")
+		self.optimize = optimize
+
+	def key(self, source):
+		digest = hashlib.sha256()
+		digest.update(f"{VERSION} {sys.version_info[:2]} {marshal.version} {self.optimize} {schema}".encode())
+		digest.update(source.encode())
+		return digest.hexdigest()
+
+	def load(self, source):
+		# Loading builds a few million tuples and nodes, none of them in
+		# cycles, so the collector is paused meanwhile. The AST then lives
+		# as long as the program does; freezing it keeps later collections
+		# from walking all of it again.
+		enabled = gc.isenabled()
+		gc.disable()
+		try:
+			program = self.read(self.path, source)
+			if program == None: return None
+			statements = decode(program)
+			del program
+			gc.freeze()
+			return statements
+		except Exception:
+			return None
+		finally:
+			if enabled: gc.enable()
+
+	def store(self, source, statements):
+		try:
+			self.write(self.path, source, encode(statements))
+		except (OSError, ValueError, RecursionError):
+			pass
+
+	def loadProgram(self, source):
+		from transpiler import PyProgram
+		try:
+			data = self.read(self.pyPath, source)
+			if data == None: return None
+			return PyProgram.load(data)
+		except Exception:
+			return None
+
+	def storeProgram(self, source, program):
+		try:
+			self.write(self.pyPath, source, program.dump())
+		except (OSError, ValueError):
+			pass
+
+	def read(self, path, source):
+		# What was stored for this source, or None if it was another one.
+		with open(path, "rb") as cache_file:
+			key, payload = marshal.loads(cache_file.read())
+		if key != self.key(source): return None
+		return payload
+
+	def write(self, path, source, payload):
+		data = marshal.dumps((self.key(source), payload))
+		os.makedirs(self.directory, exist_ok=True)
+		# Write to a temporary file and rename it into place, so readers
+		# never see a half-written cache.
+		fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+		try:
+			with os.fdopen(fd, "wb") as temp_file:
+				temp_file.write(data)
+			os.chmod(temp_path, 0o644)
+			os.replace(temp_path, path)
+		except BaseException:
+			os.remove(temp_path)
+			raise
+
+
+def encode(value):
+	if type(value) == list:
+		return [encode(item) for item in value]
+	if type(value) == Token:
+		return (TOKEN, value.token_type, value.lexeme, value.literal, value.line)
+	code = nodeCodes.get(type(value))
+	if code != None:
+		return (code,) + tuple(encode(getattr(value, field)) for field in type(value).__slots__)
+	return value
+
+def decode(value):
+	if type(value) == tuple:
+		code = value[0]
+		if code == TOKEN:
+			return Token(value[1], value[2], value[3], value[4])
+		return nodeClasses[code](*[decode(field) for field in value[1:]])
+	if type(value) == list:
+		return [decode(item) for item in value]
+	return value
@@ -0,0 +1,146 @@
+import gc
+import re
+from sys import intern
+from scanner import keywords
+from tokens import Token
+from tokenstore import TokenStore
+from token_type import *
+
+# Splits the source into lexemes in a single C-level pass. Blanks are eaten
+# in front of each match; newlines and comments come back as lexemes of
+# their own so lines can be counted. The final catch-all means every
+# character other than a blank ends up in some lexeme.
+lexemePattern = re.compile(r"""
+	[ \t\r]*
+	(
+		\n
+		|//[^\n]*
+		|[0-9]+(?:\.[0-9]+)?
+		|[A-Za-z_][A-Za-z0-9_]*
+		|"[^"]*"?
+		|!=|==|<=|>=
+		|[^ \t\r]
+	)
+""", re.VERBOSE)
+lexemes = lexemePattern.findall
+
+fixed = {
+	"(": LEFT_PAREN,
+	")": RIGHT_PAREN,
+	"{": LEFT_BRACE,
+	"}": RIGHT_BRACE,
+	"[": LEFT_BRACKET,
+	"]": RIGHT_BRACKET,
+	",": COMMA,
+	".": DOT,
+	"-": MINUS,
+	"+": PLUS,
+	";": SEMICOLON,
+	"*": STAR,
+	"/": SLASH,
+	"!": BANG,
+	"!=": BANG_EQUAL,
+	"=": EQUAL,
+	"==": EQUAL_EQUAL,
+	"<": LESS,
+	"<=": LESS_EQUAL,
+	">": GREATER,
+	">=": GREATER_EQUAL,
+}
+fixed.update(keywords)
+
+digits = "0123456789"
+identifierStart = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_"
+
+class RegexScanner:
+	# Produces the same tokens and errors as Scanner, but leaves the
+	# per-character work to the regex engine: the Python loop runs once per
+	# lexeme and mostly ends in a single dict lookup.
+	def __init__(self, source: str, error):
+		self.source = source
+		self.tokens = []
+		self.line = 1
+		self.error = error
+
+	def scanTokens(self):
+		# Tokens never form reference cycles, so letting the collector run
+		# while a large file allocates them only costs time.
+		enabled = gc.isenabled()
+		gc.disable()
+		try:
+			self.tokens.extend(self.tokenize(lexemes(self.source)))
+		finally:
+			if enabled: gc.enable()
+		return self.tokens
+
+	def scanTokensLazily(self):
+		# Streaming mode: yields tokens as the parser asks for them, so only
+		# the lexeme under the cursor is alive at any time.
+		return self.tokenize(match.group(1) for match in lexemePattern.finditer(self.source))
+
+	def scanTokenStore(self):
+		# Columnar mode: records type, offset, length and line per token in a
+		# TokenStore instead of building Token objects.
+		store = TokenStore(self.source)
+		types = store.types.append
+		starts = store.starts.append
+		lengths = store.lengths.append
+		lines = store.lines.append
+		line = self.line
+		for match in lexemePattern.finditer(self.source):
+			text = match.group(1)
+			token_type = fixed.get(text)
+			if token_type == None:
+				c = text[0]
+				if c in identifierStart:
+					token_type = IDENTIFIER
+				elif c == "\n":
+					line += 1
+					continue
+				elif c in digits:
+					token_type = NUMBER
+				elif c == '"':
+					line += text.count("\n")
+					if len(text) == 1 or text[-1] != '"':
+						self.error(line, "Unterminated string.")
+						continue
+					token_type = STRING
+				elif c == "/":
+					continue
+				else:
+					self.error(line, f"({c})Unexpected character.")
+					continue
+			types(token_type)
+			starts(match.start(1))
+			lengths(len(text))
+			lines(line)
+		self.line = line
+		store.add(EOF, len(self.source), 0, line)
+		return store
+
+	def tokenize(self, texts):
+		line = self.line
+		for text in texts:
+			token_type = fixed.get(text)
+			if token_type != None:
+				yield Token(token_type, text, None, line)
+				continue
+			c = text[0]
+			if c in identifierStart:
+				yield Token(IDENTIFIER, intern(text), None, line)
+			elif c == "\n":
+				line += 1
+			elif c in digits:
+				yield Token(NUMBER, text, float(text), line)
+			elif c == '"':
+				line += text.count("\n")
+				if len(text) == 1 or text[-1] != '"':
+					self.error(line, "Unterminated string.")
+				else:
+					yield Token(STRING, text, text[1:-1], line)
+			elif c == "/":
+				pass
+			else:
+				self.error(line, f"({c})Unexpected character.")
+		self.line = line
+		yield Token(EOF, "", None, line)
@@ -0,0 +1,205 @@
+from expr import ArrayLiteral, Assign, Binary, Call, Get, Grouping, Index, Literal, Logical, Set, SetIndex, This, Unary, Variable
+from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
+
+NONE = 0
+FUNCTION = 1
+METHOD = 2
+
+IN_CLASS = 1
+
+class Resolver:
+	def __init__(self, parser_error):
+		self.parser_error = parser_error
+		self.scopes = []
+		self.currentFunction = NONE
+		self.currentClass = NONE
+
+	def resolve(self, statements):
+		for statement in statements:
+			self.resolveStmt(statement)
+
+	def resolveStmt(self, stmt):
+		stmt.accept(self)
+
+	def resolveExpr(self, expr):
+		expr.accept(self)
+
+	def visitBlockStmt(self, stmt: Block):
+		self.beginScope()
+		self.resolve(stmt.statements)
+		stmt.size = len(self.scopes[-1])
+		self.endScope()
+		return None
+
+	def visitClassStmt(self, stmt: Class):
+		enclosingClass = self.currentClass
+		self.currentClass = IN_CLASS
+		stmt.slot = self.declare(stmt.name)
+		self.define(stmt.name)
+
+		for method in stmt.methods:
+			self.resolveFunction(method, METHOD)
+
+		self.currentClass = enclosingClass
+		return None
+
+	def visitExpressionStmt(self, stmt: Expression):
+		self.resolveExpr(stmt.expression)
+		return None
+
+	def visitFunctionStmt(self, stmt: Function):
+		stmt.slot = self.declare(stmt.name)
+		self.define(stmt.name)
+		self.resolveFunction(stmt, FUNCTION)
+		return None
+
+	def visitIfStmt(self, stmt: If):
+		self.resolveExpr(stmt.condition)
+		self.resolveStmt(stmt.thenBranch)
+		if stmt.elseBranch != None: self.resolveStmt(stmt.elseBranch)
+		return None
+
+	def visitPrintStmt(self, stmt: Print):
+		self.resolveExpr(stmt.expression)
+		return None
+
+	def visitReturnStmt(self, stmt: Return):
+		if self.currentFunction == NONE:
+			self.parser_error(stmt.keyword, "Can't return from top-level code.")
+		if stmt.value != None:
+			self.resolveExpr(stmt.value)
+		return None
+
+	def visitVarStmt(self, stmt: Var):
+		stmt.slot = self.declare(stmt.name)
+		if stmt.initializer != None:
+			self.resolveExpr(stmt.initializer)
+		self.define(stmt.name)
+		return None
+
+	def visitWhileStmt(self, stmt: While):
+		self.resolveExpr(stmt.condition)
+		self.resolveStmt(stmt.body)
+		return None
+
+	def visitAssignExpr(self, expr: Assign):
+		self.resolveExpr(expr.value)
+		self.resolveLocal(expr, expr.name)
+		return None
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		for element in expr.elements:
+			self.resolveExpr(element)
+		return None
+
+	def visitBinaryExpr(self, expr: Binary):
+		self.resolveExpr(expr.left)
+		self.resolveExpr(expr.right)
+		return None
+
+	def visitCallExpr(self, expr: Call):
+		self.resolveExpr(expr.callee)
+		for argument in expr.arguments:
+			self.resolveExpr(argument)
+		return None
+
+	def visitGetExpr(self, expr: Get):
+		self.resolveExpr(expr.object)
+		return None
+
+	def visitGroupingExpr(self, expr: Grouping):
+		self.resolveExpr(expr.expression)
+		return None
+
+	def visitIndexExpr(self, expr: Index):
+		self.resolveExpr(expr.object)
+		self.resolveExpr(expr.index)
+		return None
+
+	def visitLiteralExpr(self, expr: Literal):
+		return None
+
+	def visitLogicalExpr(self, expr: Logical):
+		self.resolveExpr(expr.left)
+		self.resolveExpr(expr.right)
+		return None
+
+	def visitSetExpr(self, expr: Set):
+		self.resolveExpr(expr.value)
+		self.resolveExpr(expr.object)
+		return None
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		self.resolveExpr(expr.value)
+		self.resolveExpr(expr.object)
+		self.resolveExpr(expr.index)
+		return None
+
+	def visitThisExpr(self, expr: This):
+		if self.currentClass == NONE:
+			self.parser_error(expr.keyword, "Can't use 'this' outside of a class.")
+			return None
+		self.resolveLocal(expr, expr.keyword)
+		return None
+
+	def visitUnaryExpr(self, expr: Unary):
+		self.resolveExpr(expr.right)
+		return None
+
+	def visitVariableExpr(self, expr: Variable):
+		if len(self.scopes) > 0:
+			local = self.scopes[-1].get(expr.name.lexeme)
+			if local != None and local[1] == False:
+				self.parser_error(expr.name, "Can't read local variable in its own initializer.")
+		self.resolveLocal(expr, expr.name)
+		return None
+
+	def resolveFunction(self, function: Function, function_type):
+		enclosingFunction = self.currentFunction
+		self.currentFunction = function_type
+		self.beginScope()
+		if function_type == METHOD:
+			# A method's receiver takes slot 0 of its own environment, so a
+			# call needs no extra scope to hold 'this'.
+			self.declareName("this")
+		for param in function.params:
+			self.declare(param)
+			self.define(param)
+		self.resolve(function.body)
+		function.size = len(self.scopes[-1])
+		self.endScope()
+		self.currentFunction = enclosingFunction
+
+	def beginScope(self):
+		self.scopes.append({})
+
+	def endScope(self):
+		self.scopes.pop()
+
+	def declare(self, name):
+		if len(self.scopes) == 0: return None
+		scope = self.scopes[-1]
+		if name.lexeme in scope:
+			self.parser_error(name, "Already a variable with this name in this scope.")
+			return scope[name.lexeme][0]
+		return self.declareName(name.lexeme, False)
+
+	def declareName(self, name, defined=True):
+		# Each scope hands out slots in declaration order: [slot, defined].
+		scope = self.scopes[-1]
+		slot = len(scope)
+		scope[name] = [slot, defined]
+		return slot
+
+	def define(self, name):
+		if len(self.scopes) == 0: return
+		self.scopes[-1][name.lexeme][1] = True
+
+	def resolveLocal(self, expr, name):
+		for i in range(len(self.scopes) - 1, -1, -1):
+			local = self.scopes[i].get(name.lexeme)
+			if local != None:
+				expr.depth = len(self.scopes) - 1 - i
+				expr.slot = local[0]
+				return
+		# Not found locally: left unresolved and looked up in globals.
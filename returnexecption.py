@@ -1,4 +0,0 @@
-class ReturnException(Exception):
-	def __init__(self, value):
-		super().__init__("Return")
-		self.value = value
\ No newline at end of file
@@ -17,6 +17,7 @@ from token_type import (
 	IDENTIFIER,
 	IF,
 	LEFT_BRACE,
+	LEFT_BRACKET,
 	LEFT_PAREN,
 	LESS_EQUAL,
 	MINUS,
@@ -26,6 +27,7 @@ from token_type import (
 	PRINT,
 	RETURN,
 	RIGHT_BRACE,
+	RIGHT_BRACKET,
 	RIGHT_PAREN,
 	SEMICOLON,
 	SLASH,
@@ -88,6 +90,10 @@ class Scanner:
 			self.addToken(LEFT_BRACE)
 		elif c == "}":
 			self.addToken(RIGHT_BRACE)
+		elif c == "[":
+			self.addToken(LEFT_BRACKET)
+		elif c == "]":
+			self.addToken(RIGHT_BRACKET)
 		elif c == ",":
 			self.addToken(COMMA)
 		elif c == ".":
@@ -110,7 +116,7 @@ class Scanner:
 			self.addToken(GREATER_EQUAL if self.match("=") else GREATER)
 		elif c == "/":
 			if self.match("/"):
-				while self.peek() != "\n" and self.isAtEnd():
+				while self.peek() != "\n" and not self.isAtEnd():
 					self.advance()
 			else:
 				self.addToken(SLASH)
@@ -142,13 +148,12 @@ class Scanner:
 		return self.isAlpha(c) or self.isDigit(c)
 
 	def identifier(self):
-		token_type = IDENTIFIER
 		while self.isAlphaNumeric(self.peek()):
 			self.advance()
-			text = self.source[self.start:self.current]
-			token_type = keywords.get(text)
-			if (token_type == None):
-				token_type = IDENTIFIER
+		text = self.source[self.start:self.current]
+		token_type = keywords.get(text)
+		if (token_type == None):
+			token_type = IDENTIFIER
 		self.addToken(token_type)
 
 	def number(self):
@@ -164,12 +169,13 @@ class Scanner:
 
 	def string(self):
 		while self.peek() != '"' and not self.isAtEnd():
-			self.advance()
 			if self.peek() == "\n":
-				line += 1
+				self.line += 1
+			self.advance()
 
 		if self.isAtEnd():
-			self.error(line, "Unterminated string.")
+			self.error(self.line, "Unterminated string.")
+			return
 
 		# Consume '"'
 		self.advance()
@@ -0,0 +1,19 @@
+class Shape:
+	# The field layout of an instance: which field lives at which index of
+	# its value list. Instances of a class that gain the same fields in the
+	# same order move through the same chain of shapes, starting from the
+	# class's empty root, so they all share these objects.
+	__slots__ = ("indexes", "transitions")
+
+	def __init__(self, indexes):
+		self.indexes = indexes
+		self.transitions = {}
+
+	def withField(self, name):
+		shape = self.transitions.get(name)
+		if shape == None:
+			indexes = dict(self.indexes)
+			indexes[name] = len(indexes)
+			shape = Shape(indexes)
+			self.transitions[name] = shape
+		return shape
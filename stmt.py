@@ -1,24 +1,30 @@
-from abc import ABC
-
-class Stmt(ABC):
-    pass
+class Stmt:
+    __slots__ = ()
 
 class Block(Stmt):
-    def __init__(self, statements):
+    __slots__ = ("statements", "size")
+
+    def __init__(self, statements, size=0):
         self.statements = statements
+        self.size = size
 
     def accept(self, visitor):
         return visitor.visitBlockStmt(self)
 
 class Class(Stmt):
-    def __init__(self, name, methods):
+    __slots__ = ("name", "methods", "slot")
+
+    def __init__(self, name, methods, slot=None):
         self.name = name
         self.methods = methods
+        self.slot = slot
 
     def accept(self, visitor):
         return visitor.visitClassStmt(self)
 
 class Expression(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -26,15 +32,21 @@ class Expression(Stmt):
         return visitor.visitExpressionStmt(self)
 
 class Function(Stmt):
-    def __init__(self, name, params, body):
+    __slots__ = ("name", "params", "body", "slot", "size")
+
+    def __init__(self, name, params, body, slot=None, size=0):
         self.name = name
         self.params = params
         self.body = body
+        self.slot = slot
+        self.size = size
 
     def accept(self, visitor):
         return visitor.visitFunctionStmt(self)
 
 class If(Stmt):
+    __slots__ = ("condition", "thenBranch", "elseBranch")
+
     def __init__(self, condition, thenBranch, elseBranch):
         self.condition = condition
         self.thenBranch = thenBranch
@@ -44,6 +56,8 @@ class If(Stmt):
         return visitor.visitIfStmt(self)
 
 class Print(Stmt):
+    __slots__ = ("expression",)
+
     def __init__(self, expression):
         self.expression = expression
 
@@ -51,6 +65,8 @@ class Print(Stmt):
         return visitor.visitPrintStmt(self)
 
 class Return(Stmt):
+    __slots__ = ("keyword", "value")
+
     def __init__(self, keyword, value):
         self.keyword = keyword
         self.value = value
@@ -59,14 +75,19 @@ class Return(Stmt):
         return visitor.visitReturnStmt(self)
 
 class Var(Stmt):
-    def __init__(self, name, initializer):
+    __slots__ = ("name", "initializer", "slot")
+
+    def __init__(self, name, initializer, slot=None):
         self.name = name
         self.initializer = initializer
+        self.slot = slot
 
     def accept(self, visitor):
         return visitor.visitVarStmt(self)
 
 class While(Stmt):
+    __slots__ = ("condition", "body")
+
     def __init__(self, condition, body):
         self.condition = condition
         self.body = body
@@ -0,0 +1,62 @@
+# Runs every program under tests/lox with each engine and checks its output
+# against the comments in it: "// expect: text" for a printed line and
+# "// expect runtime error: message" for the error that ends the run, which
+# is reported at the line of the comment. Each engine also runs them
+# unoptimized and unbuffered; the parser variants only change what the
+# engines get, so the tree-walker alone runs those.
+import importlib.util
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMS = os.path.join(ROOT, "tests", "lox")
+
+sys.path.insert(0, ROOT)
+
+from plox import ENGINES
+
+CONFIGURATIONS = [(engine, flags) for flags in ((), ("--no-optimize",), ("--unbuffered",)) for engine in ENGINES]
+CONFIGURATIONS += [("tree", ("--stream",)), ("tree", ("--columnar",))]
+
+# Programs using the vec natives, which only exist with NumPy installed.
+NUMPY = {"vectors.lox"}
+
+EXPECT = re.compile(r"// expect: ?(.*)")
+EXPECT_ERROR = re.compile(r"// expect runtime error: (.+)")
+
+def programs():
+	found = []
+	for directory, subdirectories, files in os.walk(PROGRAMS):
+		for name in files:
+			if name.endswith(".lox"):
+				found.append(os.path.relpath(os.path.join(directory, name), PROGRAMS))
+	return sorted(found)
+
+def expected(path):
+	lines = []
+	with open(path) as source:
+		for number, line in enumerate(source, 1):
+			error = EXPECT_ERROR.search(line)
+			if error != None:
+				lines += [error.group(1), f"[line {number}]"]
+				continue
+			match = EXPECT.search(line)
+			if match != None:
+				lines.append(match.group(1))
+	return lines
+
+@pytest.mark.parametrize("engine, flags", CONFIGURATIONS, ids=lambda value: " ".join(value) or "default" if type(value) == tuple else value)
+@pytest.mark.parametrize("program", programs())
+def test_program(program, engine, flags):
+	if program in NUMPY and importlib.util.find_spec("numpy") == None:
+		pytest.skip("needs NumPy")
+	path = os.path.join(PROGRAMS, program)
+	result = subprocess.run(
+		[sys.executable, os.path.join(ROOT, "plox.py"), f"--engine={engine}", "--no-cache", *flags, path],
+		capture_output=True, text=True, timeout=60)
+	assert result.stderr == ""
+	assert [line.rstrip() for line in result.stdout.splitlines()] == expected(path)
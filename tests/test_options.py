@@ -0,0 +1,143 @@
+# Checks the plox.py options that change how a program runs rather than
+# what it prints: the on-disk caches, the profilers and the VM's tail
+# calls. test_engines.py covers the rest.
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+from test_engines import PROGRAMS, ROOT, expected
+
+from globals import NativeFunction, natives
+from plox import ENGINES, Plox
+
+FIB = """fun fib(n) {
+	if (n < 2) return n;
+	return fib(n - 1) + fib(n - 2);
+}
+print fib(%d);
+"""
+
+def plox(*args):
+	result = subprocess.run([sys.executable, os.path.join(ROOT, "plox.py"), *args],
+		capture_output=True, text=True, timeout=60)
+	assert result.stderr == ""
+	return result.stdout.splitlines()
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("program", ["classes.lox", "closures.lox", "errors/error_in_function.lox"])
+def test_warm_cache(program, engine, tmp_path):
+	# The second run must get the same output from the cache, and a hit
+	# leaves the cache files as they were.
+	path = tmp_path / os.path.basename(program)
+	shutil.copy(os.path.join(PROGRAMS, program), path)
+	cached = [tmp_path / "__loxcache__" / (path.name + ".loxc")]
+	if engine == "py": cached.append(tmp_path / "__loxcache__" / (path.name + ".loxpy"))
+	lines = expected(path)
+	assert [line.rstrip() for line in plox(f"--engine={engine}", str(path))] == lines
+	written = [os.stat(cache).st_mtime_ns for cache in cached]
+	assert [line.rstrip() for line in plox(f"--engine={engine}", str(path))] == lines
+	assert [os.stat(cache).st_mtime_ns for cache in cached] == written
+
+def test_profile(tmp_path):
+	path = tmp_path / "fib.lox"
+	path.write_text(FIB % 10)
+	lines = plox("--no-cache", "--profile", str(path))
+	assert lines[0] == "55"
+	assert lines[2].split() == ["calls", "self", "s", "total", "s", "function"]
+	assert re.fullmatch(r" +177 +[\d.]+ +[\d.]+  fib \(line 1\)", lines[3])
+	assert len(lines) == 4
+
+def test_profile_lines(tmp_path):
+	path = tmp_path / "fib.lox"
+	path.write_text(FIB % 10)
+	lines = plox("--no-cache", "--profile-lines", str(path))
+	assert lines[4:6] == ["", "     hits    self s   total s  line"]
+	hits = {int(line.split()[3]): int(line.split()[0]) for line in lines[6:]}
+	# Line 2 counts the if every call and the return below it in 89 of them.
+	assert hits == {1: 1, 2: 266, 3: 88, 5: 1}
+
+def test_profile_json(tmp_path):
+	path = tmp_path / "fib.lox"
+	path.write_text(FIB % 10)
+	report = tmp_path / "profile.json"
+	assert plox("--no-cache", f"--profile-json={report}", str(path)) == ["55"]
+	functions = json.loads(report.read_text())["functions"]
+	assert [(function["name"], function["line"], function["calls"]) for function in functions] == [("fib", 1, 177)]
+
+def test_sample(tmp_path):
+	path = tmp_path / "fib.lox"
+	path.write_text(FIB % 20)
+	stacks = tmp_path / "stacks.txt"
+	assert plox("--no-cache", f"--sample={stacks}", str(path)) == ["6765"]
+	lines = stacks.read_text().splitlines()
+	assert any(";fib:" in line for line in lines)
+	for line in lines:
+		assert re.fullmatch(r"<script>:[15](;fib:3)*(;fib:[23])? \d+", line)
+
+def test_profilers_need_tree_engine(tmp_path):
+	path = tmp_path / "fib.lox"
+	path.write_text(FIB % 10)
+	assert plox("--engine=vm", "--profile", str(path))[0].startswith("Usage:")
+
+TAIL_CALLS = """
+fun count(n) {
+	if (n == 0) { depth(); return "done"; }
+	return count(n - 1);
+}
+print count(100000);
+class Counter {
+	count(n) {
+		if (n == 0) { depth(); return "done"; }
+		return this.count(n - 1);
+	}
+}
+print Counter().count(100000);
+"""
+
+def test_vm_tail_calls_reuse_frames(capsys):
+	# depth() sees the script's frame and the one running count, however
+	# deep the recursion has gone.
+	depths = []
+	natives["depth"] = NativeFunction("depth", 0, lambda vm: depths.append(len(vm.frames)), True)
+	try:
+		Plox("vm").run(TAIL_CALLS)
+	finally:
+		del natives["depth"]
+	assert capsys.readouterr().out == "done\ndone\n"
+	assert depths == [2, 2]
+
+def test_stack_overflow(tmp_path):
+	path = tmp_path / "deep.lox"
+	path.write_text("fun deep(n) { if (n == 0) return 0; return 1 + deep(n - 1); }\nprint deep(100000);\n")
+	assert plox("--no-cache", str(path)) == ["Stack overflow. Run with --engine=vm for deep recursion."]
+	assert plox("--no-cache", "--engine=vm", str(path)) == ["100000"]
+
+def test_py_engine_leaves_globals_alone(capsys):
+	# The REPL's runs share one set of globals, with the other engines too.
+	lox = Plox("py")
+	lox.run("var greeting = \"hi\"; fun greet(name) { return greeting + \" \" + name; }")
+	assert "__builtins__" not in lox.interpreter.globals.values
+	lox.run("print greet(\"there\");")
+	lox.engine = "tree"
+	lox.run("print greeting;")
+	assert capsys.readouterr().out == "hi there\nhi\n"
+	assert "__builtins__" not in lox.interpreter.globals.values
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_python_runtime_error(engine, capsys):
+	# A RuntimeError that is not a Lox one is reported without a line.
+	def fail():
+		raise NotImplementedError("not yet")
+	natives["fail"] = NativeFunction("fail", 0, fail)
+	try:
+		lox = Plox(engine)
+		lox.run("print \"before\";\nfail();")
+	finally:
+		del natives["fail"]
+	assert capsys.readouterr().out == "before\nRuntime error: not yet\n"
+	assert lox.hadRuntimeError
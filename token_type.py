@@ -36,4 +36,6 @@ VAR = 34
 WHILE = 35
 EOF = 36
 FOR = 37
-EQUAL = 38
\ No newline at end of file
+EQUAL = 38
+LEFT_BRACKET = 39
+RIGHT_BRACKET = 40
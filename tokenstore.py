@@ -0,0 +1,39 @@
+from array import array
+from sys import intern
+from tokens import Token
+from token_type import IDENTIFIER, NUMBER, STRING
+
+class TokenStore:
+	# Tokens kept as parallel int columns over the source text. A Token
+	# object is only built when the parser asks for one, and its lexeme and
+	# literal are sliced out of the source at that point.
+	def __init__(self, source):
+		self.source = source
+		self.types = array('i')
+		self.starts = array('i')
+		self.lengths = array('i')
+		self.lines = array('i')
+
+	def add(self, token_type, start, length, line):
+		self.types.append(token_type)
+		self.starts.append(start)
+		self.lengths.append(length)
+		self.lines.append(line)
+
+	def __len__(self):
+		return len(self.types)
+
+	def lexeme(self, index):
+		start = self.starts[index]
+		lexeme = self.source[start:start + self.lengths[index]]
+		if self.types[index] == IDENTIFIER: return intern(lexeme)
+		return lexeme
+
+	def literal(self, index):
+		token_type = self.types[index]
+		if token_type == NUMBER: return float(self.lexeme(index))
+		if token_type == STRING: return self.lexeme(index)[1:-1]
+		return None
+
+	def token(self, index):
+		return Token(self.types[index], self.lexeme(index), self.literal(index), self.lines[index])
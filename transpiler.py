@@ -0,0 +1,672 @@
+import keyword
+import marshal
+import types
+from expr import ArrayLiteral, Assign, Binary, Call, Get, Grouping, Index, Literal, Logical, Set, SetIndex, This, Unary, Variable
+from globals import NativeError
+from loxarray import LoxArray
+from loxcallable import LoxCallable
+from loxclass import LoxClass
+from loxinstance import LoxInstance
+from loxmap import LoxMap
+from loxvec import LoxVec, elementwise
+from stmt import Block, Class, Expression, Function, If, Print, Return, Var, While
+from token_type import *
+from tokens import Token
+
+VARIABLE = 0
+FUNCTION = 1
+CLASS = 2
+THIS = 3
+
+comparisons = {GREATER: ">", GREATER_EQUAL: ">=", LESS: "<", LESS_EQUAL: "<="}
+arithmetic = {MINUS: "-", SLASH: "/", STAR: "*"}
+
+def isSafeGlobal(name):
+	# Lox globals are plain Python globals unless the name is reserved.
+	return not keyword.iskeyword(name) and not name.startswith("__lox_") and name != "__builtins__"
+
+class Binding:
+	__slots__ = ("pyname", "function", "kind", "captured", "assigned")
+
+	def __init__(self, pyname, function, kind):
+		self.pyname = pyname
+		self.function = function
+		self.kind = kind
+		self.captured = False
+		self.assigned = False
+
+	def boxed(self):
+		# Captured variables that can change after a closure is created live in
+		# a one-element list; everything else is passed to closures by value.
+		return self.captured and (self.assigned or self.kind == FUNCTION or self.kind == CLASS)
+
+class FunctionContext:
+	def __init__(self, enclosing):
+		self.enclosing = enclosing
+		self.free = []
+
+class Scope:
+	__slots__ = ("bindings", "function")
+
+	def __init__(self, function):
+		self.bindings = []
+		self.function = function
+
+class CaptureAnalyzer:
+	# Mirrors the resolver's scopes to map every resolved (depth, slot) to a
+	# declaration, and records which declarations closures capture.
+	def __init__(self):
+		self.scopes = []
+		self.main = FunctionContext(None)
+		self.function = self.main
+		self.contexts = {}
+		self.declarations = {}
+		self.references = {}
+		self.count = 0
+
+	def analyze(self, statements):
+		for statement in statements:
+			statement.accept(self)
+
+	def declare(self, key, name, kind):
+		if len(self.scopes) == 0: return None
+		binding = Binding(f"__lox_v{self.count}_{name}", self.function, kind)
+		self.count += 1
+		self.scopes[-1].bindings.append(binding)
+		self.declarations[key] = binding
+		return binding
+
+	def reference(self, expr, assigned=False):
+		if expr.depth == None: return
+		binding = self.scopes[-1 - expr.depth].bindings[expr.slot]
+		self.references[expr] = binding
+		if assigned: binding.assigned = True
+		function = self.function
+		while function is not binding.function:
+			binding.captured = True
+			if binding not in function.free:
+				function.free.append(binding)
+			function = function.enclosing
+
+	def resolveFunction(self, stmt: Function, thisKey=None):
+		context = FunctionContext(self.function)
+		self.contexts[stmt] = context
+		enclosing = self.function
+		self.function = context
+		self.scopes.append(Scope(context))
+		if thisKey != None:
+			self.declare(thisKey, "this", THIS)
+		for i in range(len(stmt.params)):
+			self.declare((stmt, i), stmt.params[i].lexeme, VARIABLE)
+		self.analyze(stmt.body)
+		self.scopes.pop()
+		self.function = enclosing
+
+	def visitBlockStmt(self, stmt: Block):
+		self.scopes.append(Scope(self.function))
+		self.analyze(stmt.statements)
+		self.scopes.pop()
+
+	def visitClassStmt(self, stmt: Class):
+		self.declare(stmt, stmt.name.lexeme, CLASS)
+		for method in stmt.methods:
+			self.resolveFunction(method, (method, "this"))
+
+	def visitExpressionStmt(self, stmt: Expression):
+		stmt.expression.accept(self)
+
+	def visitFunctionStmt(self, stmt: Function):
+		self.declare(stmt, stmt.name.lexeme, FUNCTION)
+		self.resolveFunction(stmt)
+
+	def visitIfStmt(self, stmt: If):
+		stmt.condition.accept(self)
+		stmt.thenBranch.accept(self)
+		if stmt.elseBranch != None: stmt.elseBranch.accept(self)
+
+	def visitPrintStmt(self, stmt: Print):
+		stmt.expression.accept(self)
+
+	def visitReturnStmt(self, stmt: Return):
+		if stmt.value != None: stmt.value.accept(self)
+
+	def visitVarStmt(self, stmt: Var):
+		self.declare(stmt, stmt.name.lexeme, VARIABLE)
+		if stmt.initializer != None: stmt.initializer.accept(self)
+
+	def visitWhileStmt(self, stmt: While):
+		stmt.condition.accept(self)
+		stmt.body.accept(self)
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		for element in expr.elements:
+			element.accept(self)
+
+	def visitAssignExpr(self, expr: Assign):
+		expr.value.accept(self)
+		self.reference(expr, True)
+
+	def visitBinaryExpr(self, expr: Binary):
+		expr.left.accept(self)
+		expr.right.accept(self)
+
+	def visitCallExpr(self, expr: Call):
+		expr.callee.accept(self)
+		for argument in expr.arguments:
+			argument.accept(self)
+
+	def visitGetExpr(self, expr: Get):
+		expr.object.accept(self)
+
+	def visitGroupingExpr(self, expr: Grouping):
+		expr.expression.accept(self)
+
+	def visitIndexExpr(self, expr: Index):
+		expr.object.accept(self)
+		expr.index.accept(self)
+
+	def visitLiteralExpr(self, expr: Literal):
+		pass
+
+	def visitLogicalExpr(self, expr: Logical):
+		expr.left.accept(self)
+		expr.right.accept(self)
+
+	def visitSetExpr(self, expr: Set):
+		expr.object.accept(self)
+		expr.value.accept(self)
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		expr.object.accept(self)
+		expr.index.accept(self)
+		expr.value.accept(self)
+
+	def visitThisExpr(self, expr: This):
+		self.reference(expr)
+
+	def visitUnaryExpr(self, expr: Unary):
+		expr.right.accept(self)
+
+	def visitVariableExpr(self, expr: Variable):
+		self.reference(expr)
+
+class PyFunction:
+	def __init__(self, context):
+		self.context = context
+		self.lines = []
+		self.globals = []
+		self.indent = 1
+
+class Transpiler:
+	# Translates resolved Lox statements into the source of one Python
+	# function, __lox_main. Lox functions become nested defs that receive
+	# captured variables as keyword-only defaults, so the generated code uses
+	# only fast locals, globals and a handful of runtime helpers.
+	def __init__(self):
+		self.analyzer = CaptureAnalyzer()
+		self.function = None
+		self.line = 0
+		self.temps = 0
+		self.tokens = []
+		self.tokenIndex = {}
+
+	def transpile(self, statements):
+		self.analyzer.analyze(statements)
+		self.function = PyFunction(self.analyzer.main)
+		for statement in statements:
+			self.emitStmt(statement)
+		lines = self.assemble("def __lox_main(__lox_k):", self.function, 0)
+		source = "\n".join("\t" * indent + text for indent, text, line in lines) + "\n"
+		module = compile(source, "<lox>", "exec")
+		code = [const for const in module.co_consts if type(const) == types.CodeType][0]
+		return PyProgram(code, tuple(self.tokens), tuple(line for indent, text, line in lines))
+
+	def assemble(self, header, function, indent):
+		lines = [(indent, header, self.line)]
+		if len(function.globals) > 0:
+			lines.append((indent + 1, "global " + ", ".join(function.globals), self.line))
+		for lineIndent, text, line in function.lines:
+			lines.append((indent + lineIndent, text, line))
+		if len(function.lines) == 0:
+			lines.append((indent + 1, "pass", self.line))
+		return lines
+
+	def emit(self, text):
+		self.function.lines.append((self.function.indent, text, self.line))
+
+	def suite(self, stmt):
+		self.function.indent += 1
+		count = len(self.function.lines)
+		self.emitStmt(stmt)
+		if len(self.function.lines) == count:
+			self.emit("pass")
+		self.function.indent -= 1
+
+	def temp(self):
+		self.temps += 1
+		return f"__lox_t{self.temps}"
+
+	def token(self, token):
+		key = (token.lexeme, token.line)
+		if key not in self.tokenIndex:
+			self.tokenIndex[key] = len(self.tokens)
+			self.tokens.append(key)
+		return f"__lox_k[{self.tokenIndex[key]}]"
+
+	def declareGlobal(self, name):
+		if name not in self.function.globals:
+			self.function.globals.append(name)
+
+	def emitStmt(self, stmt):
+		stmt.accept(self)
+
+	def lineOf(self, expr):
+		# Statements carry no line; use the first token of their expression.
+		if type(expr) == Assign or type(expr) == Variable: return expr.name.line
+		if type(expr) == This: return expr.keyword.line
+		if type(expr) == Unary: return expr.operator.line
+		if type(expr) == Binary or type(expr) == Logical: return self.lineOf(expr.left)
+		if type(expr) == Call: return self.lineOf(expr.callee)
+		if type(expr) == Get or type(expr) == Set: return self.lineOf(expr.object)
+		if type(expr) == Index or type(expr) == SetIndex: return self.lineOf(expr.object)
+		if type(expr) == ArrayLiteral: return expr.bracket.line
+		if type(expr) == Grouping: return self.lineOf(expr.expression)
+		return self.line
+
+	def compileExpr(self, expr):
+		return expr.accept(self)
+
+	def condition(self, expr):
+		if self.isBool(expr):
+			return self.compileExpr(expr)
+		t = self.temp()
+		return f"(({t} := {self.compileExpr(expr)}) is not None and {t} is not False)"
+
+	def isBool(self, expr):
+		if type(expr) == Grouping: return self.isBool(expr.expression)
+		if type(expr) == Literal: return type(expr.value) == bool
+		if type(expr) == Unary: return expr.operator.token_type == BANG
+		if type(expr) == Binary: return expr.operator.token_type in comparisons or expr.operator.token_type in (EQUAL_EQUAL, BANG_EQUAL)
+		return False
+
+	def storeTo(self, binding, name, value):
+		# Statement form of defining or assigning a variable.
+		if binding == None:
+			if isSafeGlobal(name):
+				self.declareGlobal(name)
+				self.emit(f"{name} = {value}")
+			else:
+				self.emit(f"__lox_globals[{name!r}] = {value}")
+		elif binding.boxed():
+			self.emit(f"{binding.pyname}[0] = {value}")
+		else:
+			self.emit(f"{binding.pyname} = {value}")
+
+	def emitFunction(self, stmt: Function, defName, thisBinding=None):
+		context = self.analyzer.contexts[stmt]
+		params = [self.analyzer.declarations[(stmt, i)] for i in range(len(stmt.params))]
+		names = [param.pyname for param in params]
+		if thisBinding != None:
+			names.insert(0, thisBinding.pyname)
+		defaults = ["__lox_k=__lox_k"] + [f"{binding.pyname}={binding.pyname}" for binding in context.free]
+		header = f"def {defName}({', '.join(names + ['*'] + defaults)}):"
+
+		enclosing = self.function
+		self.function = PyFunction(context)
+		for param in params:
+			if param.boxed(): self.emit(f"{param.pyname} = [{param.pyname}]")
+		for statement in stmt.body:
+			self.emitStmt(statement)
+		function = self.function
+		self.function = enclosing
+		self.function.lines.extend(self.assemble(header, function, self.function.indent))
+
+	def visitBlockStmt(self, stmt: Block):
+		for statement in stmt.statements:
+			self.emitStmt(statement)
+
+	def visitClassStmt(self, stmt: Class):
+		self.line = stmt.name.line
+		binding = self.analyzer.declarations.get(stmt)
+		if binding != None and binding.boxed():
+			self.emit(f"{binding.pyname} = [None]")
+		methods = []
+		for method in stmt.methods:
+			self.line = method.name.line
+			self.temps += 1
+			defName = f"__lox_m{self.temps}_{method.name.lexeme}"
+			self.emitFunction(method, defName, self.analyzer.declarations[(method, "this")])
+			self.emit(f"{defName}.__name__ = {method.name.lexeme!r}")
+			methods.append(f"{method.name.lexeme!r}: {defName}")
+		self.line = stmt.name.line
+		self.storeTo(binding, stmt.name.lexeme, f"__lox_class({stmt.name.lexeme!r}, {{{', '.join(methods)}}})")
+
+	def visitExpressionStmt(self, stmt: Expression):
+		self.line = self.lineOf(stmt.expression)
+		if type(stmt.expression) == Assign:
+			self.assignStmt(stmt.expression)
+		else:
+			self.emit(self.compileExpr(stmt.expression))
+
+	def visitFunctionStmt(self, stmt: Function):
+		self.line = stmt.name.line
+		name = stmt.name.lexeme
+		binding = self.analyzer.declarations.get(stmt)
+		if binding == None and isSafeGlobal(name):
+			self.declareGlobal(name)
+			self.emitFunction(stmt, name)
+			return
+		if binding != None and not binding.boxed():
+			defName = binding.pyname
+		else:
+			self.temps += 1
+			defName = f"__lox_d{self.temps}_{name}"
+			if binding != None: self.emit(f"{binding.pyname} = [None]")
+		self.emitFunction(stmt, defName)
+		self.emit(f"{defName}.__name__ = {name!r}")
+		if defName != getattr(binding, "pyname", None):
+			self.storeTo(binding, name, defName)
+
+	def visitIfStmt(self, stmt: If):
+		self.line = self.lineOf(stmt.condition)
+		self.emit(f"if {self.condition(stmt.condition)}:")
+		self.suite(stmt.thenBranch)
+		if stmt.elseBranch != None:
+			self.emit("else:")
+			self.suite(stmt.elseBranch)
+
+	def visitPrintStmt(self, stmt: Print):
+		self.line = self.lineOf(stmt.expression)
+		self.emit(f"__lox_print({self.compileExpr(stmt.expression)})")
+
+	def visitReturnStmt(self, stmt: Return):
+		self.line = stmt.keyword.line
+		if stmt.value == None:
+			self.emit("return None")
+		else:
+			self.emit(f"return {self.compileExpr(stmt.value)}")
+
+	def visitVarStmt(self, stmt: Var):
+		self.line = stmt.name.line
+		binding = self.analyzer.declarations.get(stmt)
+		value = "None" if stmt.initializer == None else self.compileExpr(stmt.initializer)
+		if binding != None and binding.boxed():
+			self.emit(f"{binding.pyname} = [{value}]")
+		else:
+			self.storeTo(binding, stmt.name.lexeme, value)
+
+	def visitWhileStmt(self, stmt: While):
+		self.line = self.lineOf(stmt.condition)
+		self.emit(f"while {self.condition(stmt.condition)}:")
+		self.suite(stmt.body)
+
+	def assignStmt(self, expr: Assign):
+		value = self.compileExpr(expr.value)
+		self.line = expr.name.line
+		binding = self.analyzer.references.get(expr)
+		name = expr.name.lexeme
+		if binding != None or not isSafeGlobal(name):
+			if binding == None:
+				self.emit(f"__lox_assign_global({self.token(expr.name)}, {value})")
+			else:
+				self.storeTo(binding, name, value)
+			return
+		# Lox may only assign globals that exist: load the name first so an
+		# undefined one raises NameError after the value has been evaluated.
+		t = self.temp()
+		self.emit(f"{t} = {value}")
+		self.emit(name)
+		self.storeTo(None, name, t)
+
+	def visitAssignExpr(self, expr: Assign):
+		value = self.compileExpr(expr.value)
+		binding = self.analyzer.references.get(expr)
+		if binding == None:
+			return f"__lox_assign_global({self.token(expr.name)}, {value})"
+		if binding.boxed():
+			return f"__lox_setbox({binding.pyname}, {value})"
+		return f"({binding.pyname} := {value})"
+
+	def visitBinaryExpr(self, expr: Binary):
+		left = self.compileExpr(expr.left)
+		right = self.compileExpr(expr.right)
+		operator = expr.operator.token_type
+		if operator == EQUAL_EQUAL: return f"({left} == {right})"
+		if operator == BANG_EQUAL: return f"({left} != {right})"
+		a = self.temp()
+		b = self.temp()
+		# & rather than 'and' so both operands are always evaluated, in order.
+		check = f"(__lox_type({a} := {left}) is __lox_float) & (__lox_type({b} := {right}) is __lox_float)"
+		if operator == PLUS:
+			return f"({a} + {b} if {check} else __lox_add({a}, {b}, {self.token(expr.operator)}))"
+		if operator in arithmetic:
+			return f"({a} {arithmetic[operator]} {b} if {check} else __lox_arithmetic({a}, {b}, {self.token(expr.operator)}))"
+		return f"({a} {comparisons[operator]} {b} if {check} else __lox_numbers({self.token(expr.operator)}))"
+
+	def visitCallExpr(self, expr: Call):
+		if type(expr.callee) == Get:
+			arguments = [self.compileExpr(expr.callee.object), self.token(expr.callee.name), self.token(expr.paren)]
+			arguments += [self.compileExpr(argument) for argument in expr.arguments]
+			return f"__lox_invoke({', '.join(arguments)})"
+		callee = self.temp()
+		temps = [self.temp() for argument in expr.arguments]
+		# Evaluate callee and arguments into temps, then call directly when the
+		# callee is a transpiled function of the right arity.
+		checks = [f"(__lox_type({callee} := {self.compileExpr(expr.callee)}) is __lox_function)"]
+		for t, argument in zip(temps, expr.arguments):
+			checks.append(f"(({t} := {self.compileExpr(argument)}) is {t})")
+		arguments = ", ".join(temps)
+		slow = ", ".join([callee, self.token(expr.paren)] + temps)
+		return f"({callee}({arguments}) if ({' & '.join(checks)}) and {callee}.__code__.co_argcount == {len(temps)} else __lox_call({slow}))"
+
+	def visitGetExpr(self, expr: Get):
+		return f"__lox_get({self.compileExpr(expr.object)}, {self.token(expr.name)})"
+
+	def visitGroupingExpr(self, expr: Grouping):
+		return self.compileExpr(expr.expression)
+
+	def visitLiteralExpr(self, expr: Literal):
+		return repr(expr.value)
+
+	def visitLogicalExpr(self, expr: Logical):
+		left = self.compileExpr(expr.left)
+		right = self.compileExpr(expr.right)
+		t = self.temp()
+		truthy = f"(({t} := {left}) is not None and {t} is not False)"
+		if expr.operator.token_type == OR:
+			return f"({t} if {truthy} else {right})"
+		return f"({right} if {truthy} else {t})"
+
+	def visitArrayLiteralExpr(self, expr: ArrayLiteral):
+		return f"__lox_array([{', '.join(self.compileExpr(element) for element in expr.elements)}])"
+
+	def visitIndexExpr(self, expr: Index):
+		return f"__lox_index({self.compileExpr(expr.object)}, {self.compileExpr(expr.index)}, {self.token(expr.bracket)})"
+
+	def visitSetIndexExpr(self, expr: SetIndex):
+		return f"__lox_set_index({self.compileExpr(expr.object)}, {self.compileExpr(expr.index)}, {self.compileExpr(expr.value)}, {self.token(expr.bracket)})"
+
+	def visitSetExpr(self, expr: Set):
+		return f"__lox_set({self.compileExpr(expr.object)}, {self.token(expr.name)}, {self.compileExpr(expr.value)})"
+
+	def visitThisExpr(self, expr: This):
+		return self.analyzer.references[expr].pyname
+
+	def visitUnaryExpr(self, expr: Unary):
+		right = self.compileExpr(expr.right)
+		if expr.operator.token_type == BANG:
+			if self.isBool(expr.right): return f"(not {right})"
+			t = self.temp()
+			return f"(({t} := {right}) is None or {t} is False)"
+		t = self.temp()
+		return f"(-{t} if __lox_type({t} := {right}) is __lox_float else __lox_number({self.token(expr.operator)}))"
+
+	def visitVariableExpr(self, expr: Variable):
+		binding = self.analyzer.references.get(expr)
+		if binding == None:
+			if isSafeGlobal(expr.name.lexeme): return expr.name.lexeme
+			return f"__lox_global({self.token(expr.name)})"
+		if binding.boxed(): return f"{binding.pyname}[0]"
+		return binding.pyname
+
+class PyMethod:
+	def __init__(self, function):
+		self.function = function
+
+	def bind(self, instance):
+		return types.MethodType(self.function, instance)
+
+def runtime(interpreter, namespace):
+	# Helpers the generated code reaches through its builtins; only the
+	# slow and error paths go through them.
+	def arity(callee):
+		if type(callee) == types.FunctionType: return callee.__code__.co_argcount
+		if type(callee) == types.MethodType: return callee.__func__.__code__.co_argcount - 1
+		return callee.arity()
+
+	def call(callee, paren, *arguments):
+		if type(callee) != types.FunctionType and type(callee) != types.MethodType and not isinstance(callee, LoxCallable):
+			raise RuntimeError(paren, "Can only call functions and classes.")
+		if len(arguments) != arity(callee):
+			raise RuntimeError(paren, f"Expected {arity(callee)} arguments but got {len(arguments)}.")
+		if isinstance(callee, LoxCallable):
+			try:
+				return callee.call(interpreter, list(arguments))
+			except NativeError as error:
+				raise RuntimeError(paren, error.message)
+		return callee(*arguments)
+
+	def invoke(obj, name, paren, *arguments):
+		# Methods are called with obj as 'this' directly instead of going
+		# through a bound method object.
+		if isinstance(obj, LoxInstance) and name.lexeme not in obj.shape.indexes:
+			method = obj.klass.findMethod(name.lexeme)
+			if type(method) == PyMethod:
+				function = method.function
+				if len(arguments) != function.__code__.co_argcount - 1:
+					raise RuntimeError(paren, f"Expected {function.__code__.co_argcount - 1} arguments but got {len(arguments)}.")
+				return function(obj, *arguments)
+		return call(get(obj, name), paren, *arguments)
+
+	def get(obj, name):
+		if isinstance(obj, LoxInstance):
+			return obj.get(name)
+		raise RuntimeError(name, "Only instances have properties.")
+
+	def set(obj, name, value):
+		if not isinstance(obj, LoxInstance):
+			raise RuntimeError(name, "Only instances have fields.")
+		obj.set(name, value)
+		return value
+
+	def index(array, position, bracket):
+		if type(array) != LoxArray and type(array) != LoxMap:
+			raise RuntimeError(bracket, "Only arrays and maps can be indexed.")
+		return array.get(bracket, position)
+
+	def setIndex(array, position, value, bracket):
+		if type(array) != LoxArray and type(array) != LoxMap:
+			raise RuntimeError(bracket, "Only arrays and maps can be indexed.")
+		array.set(bracket, position, value)
+		return value
+
+	def add(a, b, operator):
+		if type(a) == str and type(b) == str: return a + b
+		if type(a) == LoxVec or type(b) == LoxVec: return elementwise(operator, a, b)
+		raise RuntimeError(operator, "Operator must be two numbers or two strings.")
+
+	def arithmetic(a, b, operator):
+		if type(a) == LoxVec or type(b) == LoxVec: return elementwise(operator, a, b)
+		raise RuntimeError(operator, "Operands must be numbers.")
+
+	def numbers(operator):
+		raise RuntimeError(operator, "Operands must be numbers.")
+
+	def number(operator):
+		raise RuntimeError(operator, "Operand must be a number")
+
+	def printValue(value):
+		interpreter.output.writeLine(interpreter.stringify(value))
+
+	def makeClass(name, methods):
+		return LoxClass(name, {key: PyMethod(method) for key, method in methods.items()})
+
+	def getGlobal(name):
+		if name.lexeme in namespace: return namespace[name.lexeme]
+		raise RuntimeError(name, f"Undefined variable {name.lexeme}.")
+
+	def assignGlobal(name, value):
+		if name.lexeme not in namespace:
+			raise RuntimeError(name, f"Undefined variable {name.lexeme}.")
+		namespace[name.lexeme] = value
+		return value
+
+	def setBox(box, value):
+		box[0] = value
+		return value
+
+	return {
+		"__lox_globals": namespace,
+		"__lox_type": type,
+		"__lox_float": float,
+		"__lox_function": types.FunctionType,
+		"__lox_call": call,
+		"__lox_invoke": invoke,
+		"__lox_get": get,
+		"__lox_set": set,
+		"__lox_array": LoxArray,
+		"__lox_index": index,
+		"__lox_set_index": setIndex,
+		"__lox_add": add,
+		"__lox_arithmetic": arithmetic,
+		"__lox_numbers": numbers,
+		"__lox_number": number,
+		"__lox_print": printValue,
+		"__lox_class": makeClass,
+		"__lox_global": getGlobal,
+		"__lox_assign_global": assignGlobal,
+		"__lox_setbox": setBox,
+	}
+
+class PyProgram:
+	# A transpiled program: the code object of __lox_main, the (lexeme, line)
+	# pairs its error tokens are rebuilt from, and the Lox line of every
+	# generated source line. All three marshal, so programs can be cached.
+	def __init__(self, code, tokens, lines):
+		self.code = code
+		self.tokens = tokens
+		self.lines = lines
+
+	def dump(self):
+		return marshal.dumps((self.code, self.tokens, self.lines))
+
+	@staticmethod
+	def load(data):
+		code, tokens, lines = marshal.loads(data)
+		return PyProgram(code, tokens, lines)
+
+	def run(self, interpreter, lox):
+		# Lox globals are the module globals of the generated code. Its
+		# builtins only need to be there while functions are being made,
+		# which keep their own reference; the other engines share the dict.
+		namespace = interpreter.globals.values
+		namespace["__builtins__"] = runtime(interpreter, namespace)
+		tokens = [Token(IDENTIFIER, lexeme, None, line) for lexeme, line in self.tokens]
+		try:
+			main = types.FunctionType(self.code, namespace)
+			main(tokens)
+		except RuntimeError as error:
+			lox.runtimeError(error)
+		except NameError as error:
+			token = Token(IDENTIFIER, error.name, None, self.lineOf(error.__traceback__))
+			lox.runtimeError(RuntimeError(token, f"Undefined variable {error.name}."))
+		finally:
+			del namespace["__builtins__"]
+
+	def lineOf(self, traceback):
+		line = 0
+		while traceback != None:
+			if traceback.tb_frame.f_code.co_filename == "<lox>":
+				line = self.lines[traceback.tb_lineno - 1]
+			traceback = traceback.tb_next
+		return line
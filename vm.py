@@ -0,0 +1,605 @@
+from chunk import *
+from globals import NativeError, NativeFunction, stringify
+from interpreter import Interpreter
+from loxarray import LoxArray
+from loxcallable import LoxCallable
+from loxclass import LoxClass
+from loxinstance import LoxInstance
+from loxmap import LoxMap
+from loxvec import LoxVec, elementwise
+from tokens import Token
+from token_type import EOF
+
+vectorOperators = {OP_ADD: "+", OP_SUBTRACT: "-", OP_MULTIPLY: "*", OP_DIVIDE: "/"}
+
+class Upvalue:
+	# While open, cells is the VM stack and index the captured slot. Closing
+	# swaps in a private one-element list, so reads never need to branch.
+	__slots__ = ("cells", "index")
+
+	def __init__(self, cells, index):
+		self.cells = cells
+		self.index = index
+
+class Closure(LoxCallable):
+	def __init__(self, function, upvalues, vm):
+		self.function = function
+		self.upvalues = upvalues
+		self.vm = vm
+
+	def arity(self):
+		return self.function.arity
+
+	def call(self, interpreter, arguments):
+		return self.vm.callClosure(self, self, arguments)
+
+	def bind(self, instance):
+		return BoundMethod(instance, self)
+
+	def __str__(self):
+		return str(self.function)
+
+class BoundMethod(LoxCallable):
+	def __init__(self, receiver, method):
+		self.receiver = receiver
+		self.method = method
+
+	def arity(self):
+		return self.method.function.arity
+
+	def call(self, interpreter, arguments):
+		return self.method.vm.callClosure(self.method, self.receiver, arguments)
+
+	def __str__(self):
+		return str(self.method)
+
+class CallFrame:
+	__slots__ = ("closure", "ip", "base")
+
+	def __init__(self, closure, ip, base):
+		self.closure = closure
+		self.ip = ip
+		self.base = base
+
+class VM:
+	isTruthy = Interpreter.isTruthy
+	isEqual = Interpreter.isEqual
+	stringify = staticmethod(stringify)
+
+	def __init__(self, interpreter):
+		# Globals and natives are shared with the tree-walking interpreter.
+		self.globals = interpreter.globals.values
+		self.output = interpreter.output
+		self.stack = []
+		self.frames = []
+		self.openUpvalues = {}
+
+	def interpret(self, function, lox):
+		try:
+			self.callClosure(Closure(function, [], self), None, [])
+		except RuntimeError as error:
+			self.resetStack()
+			lox.runtimeError(error)
+
+	def resetStack(self):
+		del self.stack[:]
+		del self.frames[:]
+		self.openUpvalues.clear()
+
+	def callClosure(self, closure, receiver, arguments):
+		# Entry point for the script and for natives calling back into Lox:
+		# runs a nested loop until this frame returns.
+		if len(arguments) != closure.function.arity:
+			raise self.runtimeError(f"Expected {closure.function.arity} arguments but got {len(arguments)}.")
+		self.stack.append(receiver)
+		self.stack.extend(arguments)
+		self.frames.append(CallFrame(closure, 0, len(self.stack) - len(arguments) - 1))
+		return self.run(len(self.frames) - 1)
+
+	def line(self):
+		if len(self.frames) == 0: return 0
+		frame = self.frames[-1]
+		return frame.closure.function.chunk.lines[frame.ip - 1]
+
+	def runtimeError(self, message):
+		return RuntimeError(Token(EOF, "", None, self.line()), message)
+
+	def arithmetic(self, instruction, a, b, message):
+		# The slow path of + - * /: vector arithmetic, or else the error.
+		if type(a) != LoxVec and type(b) != LoxVec: raise self.runtimeError(message)
+		return elementwise(Token(EOF, vectorOperators[instruction], None, self.line()), a, b)
+
+	def captureUpvalue(self, location):
+		upvalue = self.openUpvalues.get(location)
+		if upvalue == None:
+			upvalue = Upvalue(self.stack, location)
+			self.openUpvalues[location] = upvalue
+		return upvalue
+
+	def closeUpvalues(self, last):
+		for location in [location for location in self.openUpvalues if location >= last]:
+			upvalue = self.openUpvalues.pop(location)
+			upvalue.cells = [self.stack[location]]
+			upvalue.index = 0
+
+	def run(self, exitDepth):
+		stack = self.stack
+		push = stack.append
+		pop = stack.pop
+		frames = self.frames
+		globals = self.globals
+
+		frame = frames[-1]
+		closure = frame.closure
+		code = closure.function.chunk.code
+		constants = closure.function.chunk.constants
+		ip = frame.ip
+		base = frame.base
+
+		while True:
+			instruction = code[ip]
+			ip += 1
+
+			# Tested in order of how often each instruction runs over
+			# benchmarks/lox, so the common ones take the fewest compares.
+			if instruction == OP_GET_LOCAL:
+				push(stack[base + code[ip]])
+				ip += 1
+
+			elif instruction == OP_GET_GLOBAL:
+				try:
+					push(globals[constants[code[ip]]])
+				except KeyError:
+					frame.ip = ip + 1
+					raise self.runtimeError(f"Undefined variable {constants[code[ip]]}.")
+				ip += 1
+
+			elif instruction == OP_CONSTANT:
+				push(constants[code[ip]])
+				ip += 1
+
+			elif instruction == OP_ADD_CONSTANT:
+				b = constants[code[ip]]
+				ip += 1
+				a = stack[-1]
+				if (type(a) == float and type(b) == float) or (type(a) == str and type(b) == str):
+					stack[-1] = a + b
+				else:
+					frame.ip = ip
+					stack[-1] = self.arithmetic(OP_ADD, a, b, "Operator must be two numbers or two strings.")
+
+			elif instruction == OP_CALL or instruction == OP_TAIL_CALL:
+				argCount = code[ip]
+				ip += 1
+				frame.ip = ip
+				callee = stack[-1 - argCount]
+				if type(callee) == BoundMethod:
+					stack[-1 - argCount] = callee.receiver
+					callee = callee.method
+				if type(callee) == Closure:
+					frame = self.enterClosure(frame, callee, argCount, instruction == OP_TAIL_CALL)
+					closure = callee
+					code = callee.function.chunk.code
+					constants = callee.function.chunk.constants
+					ip = 0
+					base = frame.base
+				else:
+					self.callValue(callee, argCount)
+
+			elif instruction == OP_GET_PROPERTY:
+				cache = constants[code[ip + 1]]
+				instance = stack[-1]
+				if type(instance) is not LoxInstance or instance.shape is not cache.shape:
+					self.cacheProperty(instance, constants[code[ip]], cache)
+				ip += 2
+				if cache.method is None:
+					stack[-1] = instance.values[cache.index]
+				else:
+					stack[-1] = cache.method.bind(instance)
+
+			elif instruction == OP_ADD:
+				b = pop()
+				a = stack[-1]
+				if (type(a) == float and type(b) == float) or (type(a) == str and type(b) == str):
+					stack[-1] = a + b
+				else:
+					frame.ip = ip
+					stack[-1] = self.arithmetic(instruction, a, b, "Operator must be two numbers or two strings.")
+
+			elif instruction == OP_RETURN:
+				result = pop()
+				if self.openUpvalues: self.closeUpvalues(base)
+				del stack[base:]
+				frames.pop()
+				if len(frames) == exitDepth:
+					return result
+				push(result)
+				frame = frames[-1]
+				closure = frame.closure
+				code = closure.function.chunk.code
+				constants = closure.function.chunk.constants
+				ip = frame.ip
+				base = frame.base
+
+			elif instruction == OP_STORE_GLOBAL:
+				name = constants[code[ip]]
+				ip += 1
+				if name not in globals:
+					frame.ip = ip
+					raise self.runtimeError(f"Undefined variable {name}.")
+				globals[name] = pop()
+
+			elif instruction == OP_TEST_LESS:
+				b = pop()
+				a = pop()
+				if type(a) != float or type(b) != float:
+					frame.ip = ip + 1
+					raise self.runtimeError("Operands must be numbers.")
+				if a < b:
+					ip += 1
+				else:
+					ip = code[ip]
+
+			elif instruction == OP_LOOP or instruction == OP_JUMP:
+				ip = code[ip]
+
+			elif instruction == OP_POP:
+				pop()
+
+			elif instruction == OP_STORE_PROPERTY or instruction == OP_SET_PROPERTY:
+				cache = constants[code[ip + 1]]
+				value = pop()
+				instance = stack[-1]
+				if type(instance) is not LoxInstance or instance.shape is not cache.shape:
+					self.cacheField(instance, constants[code[ip]], cache)
+				ip += 2
+				if cache.transition is None:
+					instance.values[cache.index] = value
+				else:
+					instance.shape = cache.transition
+					instance.values.append(value)
+				if instruction == OP_SET_PROPERTY:
+					stack[-1] = value
+				else:
+					pop()
+
+			elif instruction == OP_STORE_LOCAL:
+				stack[base + code[ip]] = pop()
+				ip += 1
+
+			elif instruction == OP_TEST_EQUAL:
+				b = pop()
+				if pop() == b:
+					ip += 1
+				else:
+					ip = code[ip]
+
+			elif instruction == OP_INVOKE or instruction == OP_TAIL_INVOKE:
+				argCount = code[ip + 1]
+				cache = constants[code[ip + 2]]
+				receiver = stack[-1 - argCount]
+				if type(receiver) is not LoxInstance or receiver.shape is not cache.shape:
+					self.cacheProperty(receiver, constants[code[ip]], cache)
+				ip += 3
+				frame.ip = ip
+				callee = cache.method
+				if callee is None:
+					callee = receiver.values[cache.index]
+					stack[-1 - argCount] = callee
+					if type(callee) == BoundMethod:
+						stack[-1 - argCount] = callee.receiver
+						callee = callee.method
+				if type(callee) == Closure:
+					frame = self.enterClosure(frame, callee, argCount, instruction == OP_TAIL_INVOKE)
+					closure = callee
+					code = callee.function.chunk.code
+					constants = callee.function.chunk.constants
+					ip = 0
+					base = frame.base
+				else:
+					self.callValue(callee, argCount)
+
+			elif instruction == OP_GET_UPVALUE:
+				upvalue = closure.upvalues[code[ip]]
+				push(upvalue.cells[upvalue.index])
+				ip += 1
+
+			elif instruction == OP_SUBTRACT_CONSTANT:
+				b = constants[code[ip]]
+				ip += 1
+				a = stack[-1]
+				if type(a) == float and type(b) == float:
+					stack[-1] = a - b
+				else:
+					frame.ip = ip
+					stack[-1] = self.arithmetic(OP_SUBTRACT, a, b, "Operands must be numbers.")
+
+			elif instruction == OP_TEST_LESS_EQUAL:
+				b = pop()
+				a = pop()
+				if type(a) != float or type(b) != float:
+					frame.ip = ip + 1
+					raise self.runtimeError("Operands must be numbers.")
+				if a <= b:
+					ip += 1
+				else:
+					ip = code[ip]
+
+			elif instruction == OP_NIL:
+				push(None)
+
+			elif instruction == OP_STORE_UPVALUE:
+				upvalue = closure.upvalues[code[ip]]
+				upvalue.cells[upvalue.index] = pop()
+				ip += 1
+
+			elif instruction == OP_SET_INDEX:
+				bracket = constants[code[ip]]
+				ip += 1
+				value = pop()
+				index = pop()
+				array = stack[-1]
+				if type(array) != LoxArray and type(array) != LoxMap:
+					raise RuntimeError(bracket, "Only arrays and maps can be indexed.")
+				array.set(bracket, index, value)
+				stack[-1] = value
+
+			elif instruction == OP_NOT:
+				value = stack[-1]
+				stack[-1] = value is None or value is False
+
+			elif instruction == OP_GET_INDEX:
+				bracket = constants[code[ip]]
+				ip += 1
+				index = pop()
+				array = stack[-1]
+				if type(array) != LoxArray and type(array) != LoxMap:
+					raise RuntimeError(bracket, "Only arrays and maps can be indexed.")
+				stack[-1] = array.get(bracket, index)
+
+			elif instruction == OP_POP_JUMP_IF_FALSE:
+				value = pop()
+				if value is None or value is False:
+					ip = code[ip]
+				else:
+					ip += 1
+
+			elif instruction == OP_SUBTRACT:
+				b = pop()
+				a = stack[-1]
+				if type(a) == float and type(b) == float:
+					stack[-1] = a - b
+				else:
+					frame.ip = ip
+					stack[-1] = self.arithmetic(instruction, a, b, "Operands must be numbers.")
+
+			elif instruction == OP_TEST_NOT_EQUAL:
+				b = pop()
+				if pop() != b:
+					ip += 1
+				else:
+					ip = code[ip]
+
+			elif instruction == OP_FALSE:
+				push(False)
+
+			elif instruction == OP_MULTIPLY:
+				b = pop()
+				a = stack[-1]
+				if type(a) == float and type(b) == float:
+					stack[-1] = a * b
+				else:
+					frame.ip = ip
+					stack[-1] = self.arithmetic(instruction, a, b, "Operands must be numbers.")
+
+			elif instruction == OP_DIVIDE:
+				b = pop()
+				a = stack[-1]
+				if type(a) == float and type(b) == float:
+					stack[-1] = a / b
+				else:
+					frame.ip = ip
+					stack[-1] = self.arithmetic(instruction, a, b, "Operands must be numbers.")
+
+			elif instruction == OP_TEST_GREATER:
+				b = pop()
+				a = pop()
+				if type(a) != float or type(b) != float:
+					frame.ip = ip + 1
+					raise self.runtimeError("Operands must be numbers.")
+				if a > b:
+					ip += 1
+				else:
+					ip = code[ip]
+
+			elif instruction == OP_CLOSURE:
+				function = constants[code[ip]]
+				ip += 1
+				upvalues = []
+				for i in range(function.upvalueCount):
+					if code[ip]:
+						upvalues.append(self.captureUpvalue(base + code[ip + 1]))
+					else:
+						upvalues.append(closure.upvalues[code[ip + 1]])
+					ip += 2
+				push(Closure(function, upvalues, self))
+
+			elif instruction == OP_TRUE:
+				push(True)
+
+			elif instruction == OP_SET_GLOBAL:
+				name = constants[code[ip]]
+				ip += 1
+				if name not in globals:
+					frame.ip = ip
+					raise self.runtimeError(f"Undefined variable {name}.")
+				globals[name] = stack[-1]
+
+			elif instruction == OP_LESS:
+				b = pop()
+				a = stack[-1]
+				if type(a) != float or type(b) != float:
+					frame.ip = ip
+					raise self.runtimeError("Operands must be numbers.")
+				stack[-1] = a < b
+
+			elif instruction == OP_SET_LOCAL:
+				stack[base + code[ip]] = stack[-1]
+				ip += 1
+
+			elif instruction == OP_EQUAL:
+				b = pop()
+				stack[-1] = stack[-1] == b
+
+			elif instruction == OP_TEST_GREATER_EQUAL:
+				b = pop()
+				a = pop()
+				if type(a) != float or type(b) != float:
+					frame.ip = ip + 1
+					raise self.runtimeError("Operands must be numbers.")
+				if a >= b:
+					ip += 1
+				else:
+					ip = code[ip]
+
+			elif instruction == OP_LESS_EQUAL:
+				b = pop()
+				a = stack[-1]
+				if type(a) != float or type(b) != float:
+					frame.ip = ip
+					raise self.runtimeError("Operands must be numbers.")
+				stack[-1] = a <= b
+
+			elif instruction == OP_GREATER:
+				b = pop()
+				a = stack[-1]
+				if type(a) != float or type(b) != float:
+					frame.ip = ip
+					raise self.runtimeError("Operands must be numbers.")
+				stack[-1] = a > b
+
+			elif instruction == OP_NOT_EQUAL:
+				b = pop()
+				stack[-1] = stack[-1] != b
+
+			elif instruction == OP_SET_UPVALUE:
+				upvalue = closure.upvalues[code[ip]]
+				upvalue.cells[upvalue.index] = stack[-1]
+				ip += 1
+
+			elif instruction == OP_GREATER_EQUAL:
+				b = pop()
+				a = stack[-1]
+				if type(a) != float or type(b) != float:
+					frame.ip = ip
+					raise self.runtimeError("Operands must be numbers.")
+				stack[-1] = a >= b
+
+			elif instruction == OP_NEGATE:
+				if type(stack[-1]) != float:
+					frame.ip = ip
+					raise self.runtimeError("Operand must be a number")
+				stack[-1] = -stack[-1]
+
+			elif instruction == OP_JUMP_IF_FALSE:
+				value = stack[-1]
+				if value is None or value is False:
+					ip = code[ip]
+				else:
+					ip += 1
+
+			elif instruction == OP_JUMP_IF_TRUE:
+				value = stack[-1]
+				if value is None or value is False:
+					ip += 1
+				else:
+					ip = code[ip]
+
+			elif instruction == OP_PRINT:
+				self.output.writeLine(self.stringify(pop()))
+
+			elif instruction == OP_DEFINE_GLOBAL:
+				globals[constants[code[ip]]] = pop()
+				ip += 1
+
+			elif instruction == OP_ARRAY:
+				count = code[ip]
+				ip += 1
+				elements = stack[len(stack) - count:]
+				del stack[len(stack) - count:]
+				push(LoxArray(elements))
+
+			elif instruction == OP_CLOSE_UPVALUE:
+				self.closeUpvalues(len(stack) - 1)
+				pop()
+
+			elif instruction == OP_CLASS:
+				push(LoxClass(constants[code[ip]], {}))
+				ip += 1
+
+			elif instruction == OP_METHOD:
+				method = pop()
+				stack[-1].methods[constants[code[ip]]] = method
+				ip += 1
+
+	def cacheProperty(self, instance, name, cache):
+		if not isinstance(instance, LoxInstance):
+			raise RuntimeError(name, "Only instances have properties.")
+		index = instance.shape.indexes.get(name.lexeme)
+		method = None
+		if index == None:
+			method = instance.klass.findMethod(name.lexeme)
+			if method == None:
+				raise RuntimeError(name, f"Undefined property '{name.lexeme}'.")
+		cache.shape = instance.shape
+		cache.index = index
+		cache.method = method
+
+	def cacheField(self, instance, name, cache):
+		if not isinstance(instance, LoxInstance):
+			raise RuntimeError(name, "Only instances have fields.")
+		shape = instance.shape
+		cache.shape = shape
+		cache.index = shape.indexes.get(name.lexeme)
+		cache.transition = shape.withField(name.lexeme) if cache.index == None else None
+
+	def enterClosure(self, frame, callee, argCount, tail):
+		# The frame a call or invoke runs callee in. For return f(args) the
+		# caller has nothing left to do, so the callee and its arguments
+		# replace the caller's slots and its frame is reused. Tail-recursive
+		# loops then run in constant stack.
+		function = callee.function
+		if argCount != function.arity:
+			raise self.runtimeError(f"Expected {function.arity} arguments but got {argCount}.")
+		stack = self.stack
+		if not tail:
+			frame = CallFrame(callee, 0, len(stack) - argCount - 1)
+			self.frames.append(frame)
+			return frame
+		if self.openUpvalues: self.closeUpvalues(frame.base)
+		stack[frame.base:] = stack[len(stack) - argCount - 1:]
+		frame.closure = callee
+		frame.ip = 0
+		return frame
+
+	def callValue(self, callee, argCount):
+		# Natives and classes: everything callable that is not a VM closure.
+		stack = self.stack
+		if type(callee) == NativeFunction and argCount == callee.argCount and not callee.needsInterpreter:
+			arguments = stack[len(stack) - argCount:]
+			del stack[len(stack) - argCount - 1:]
+			try:
+				stack.append(callee.function(*arguments))
+			except NativeError as error:
+				raise self.runtimeError(error.message)
+			return
+		if not isinstance(callee, LoxCallable):
+			raise self.runtimeError("Can only call functions and classes.")
+		if argCount != callee.arity():
+			raise self.runtimeError(f"Expected {callee.arity()} arguments but got {argCount}.")
+		arguments = self.stack[len(self.stack) - argCount:]
+		del self.stack[len(self.stack) - argCount - 1:]
+		try:
+			self.stack.append(callee.call(self, arguments))
+		except NativeError as error:
+			raise self.runtimeError(error.message)